@@ -0,0 +1,129 @@
+# weather_word/__main__.py
+#
+# Entry point for the Weather Word program - run with python3 -m weather_word from the directory holding the package.
+# Weather data is fetched by a background worker (see worker.py) while this loop keeps the display going. When a
+# displays file is present (see displays.py) one display loop runs for each display listed in it, fed by a pool of
+# fetch workers run on a bounded number of threads.
+
+import logging
+import threading
+
+from .config import FRAME_HOLD_TIME, SHUFFLE_TIME
+from .strip import createStrip
+from .animation import Animator
+from .effects import rainbow, pixelWipe, colorWipe, colorWipeRand
+from .palette import WARNING, ERROR
+from .worker import ForecastSlot, FetchWorker
+from .displays import readDisplaysFile, FetchPool
+from .retry import OPEN
+from .log import setupLogging
+from .metrics import startMetricsServer, watchStrip
+from .profiling import PROFILER, setupProfiling
+
+logger = logging.getLogger(__name__)
+
+def main():
+    # log to log.txt next to apiboot.txt
+    setupLogging()
+
+    # drive every display of the displays file when there is one
+    entries = readDisplaysFile()
+    if entries:
+        runDisplays(entries)
+        return
+
+    # Create NeoPixel object (or simulated strip) with appropriate configuration.
+    strip = createStrip()
+    
+    # Intialize the library (must be called once before other functions).
+    strip.begin()
+    animator = Animator(strip)
+
+    # serve the metrics on /metrics when a metrics port is configured
+    watchStrip(strip)
+    startMetricsServer()
+
+    # profile the display and fetch cycles on SIGUSR1 or when WEATHER_WORD_PROFILE is set
+    setupProfiling()
+
+    # start fetching weather data in the background - a still-fresh cached forecast is displayed right away
+    slot = ForecastSlot()
+    worker = FetchWorker(slot)
+    warm = worker.warmStart()
+    worker.start()
+    
+    # demonstrate LED strip with rainbow chase during Pi startup while the first forecast is fetched
+    if not warm:
+        rainbow(strip, animator=animator)
+    
+    raise SystemExit(runDisplay(strip, animator, slot))
+
+def runDisplays(entries):
+    # drive the displays of the displays file, each from its own thread, until all of them have stopped
+    pool = FetchPool()
+    displays = []
+    for entry in entries:
+        strip = createStrip(entry.backend, pin=entry.pin, dma=entry.dma)
+        strip.begin()
+        watchStrip(strip, display=entry.name)
+        displays.append((entry, strip, Animator(strip), pool.subscribe(entry.query, entry.units)))
+    logger.info('Starting displays.', extra={'data': {'displays': [[entry.name, entry.query, entry.units]
+                                                                   for entry, strip, animator, slot in displays]}})
+    startMetricsServer()
+    setupProfiling()
+    warm = pool.start()
+
+    # the first display also runs the profiling sessions
+    reasons = []
+    def display(entry, strip, animator, slot, primary):
+        if slot not in warm:
+            rainbow(strip, animator=animator)
+        reasons.append(runDisplay(strip, animator, slot, entry.name, primary))
+    threads = [threading.Thread(target=display, args=args + (i == 0,), name=args[0].name)
+               for i, args in enumerate(displays)]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    for thread in threads:
+        thread.join()
+    pool.stop()
+    raise SystemExit(reasons[0] if reasons else None)
+
+def runDisplay(strip, animator, slot, name='main', primary=True):
+    # main routine to display the latest weather data - returns the reason the fetch worker gave up
+    # profiling sessions are started and counted by the display cycles of the primary display only
+    version = 0
+    while True:
+        # one display cycle - shows every frame of the forecast (or one shuffle while there is none)
+        with PROFILER.cycle(display=primary):
+            if slot.fatal is not None:
+                # utilize red color wipe to signal that the program is terminating
+                logger.critical('Terminating program: ' + slot.fatal, extra={'data': {'display': name}})
+                colorWipe(strip, ERROR)
+                return slot.fatal
+
+            forecast, latestVersion = slot.latest()
+            if forecast is None:
+                # utilize yellow shuffle to signal failed attempts until the first forecast arrives, and red shuffle while
+                # requests are paused after too many failed attempts
+                if slot.circuit == OPEN:
+                    colorWipeRand(strip, ERROR, duration=SHUFFLE_TIME, animator=animator)
+                elif slot.failures:
+                    colorWipeRand(strip, WARNING, duration=SHUFFLE_TIME, animator=animator)
+                else:
+                    slot.waitForUpdate(version, SHUFFLE_TIME)
+                continue
+            if latestVersion != version:
+                version = latestVersion
+                logger.info('Display statistics.', extra={'data': {'display': name, 'animation': animator.stats(),
+                                                                   'strip': strip.stats() if hasattr(strip, 'stats') else None}})
+
+            # call function to push current, upcoming low and upcoming high weather data to the LED strip
+            # move on to a new forecast as soon as it arrives
+            for pixels in forecast.frames:
+                pixelWipe(strip, pixels, animator=animator)
+                if slot.waitForUpdate(version, FRAME_HOLD_TIME) or slot.fatal is not None:
+                    break
+
+if __name__ == '__main__':
+    main()
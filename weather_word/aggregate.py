@@ -0,0 +1,55 @@
+# weather_word/aggregate.py
+#
+# Upcoming extremes of a ForecastSeries over several horizons at once. The upcoming hours are scanned once, in segments
+# running from one horizon to the next (sorted by length), and the extremes of each segment are folded into the running
+# extremes of the horizons before it - so every hour is compared once however many horizons there are, and each extra
+# horizon costs a few comparisons rather than another scan of the forecast.
+
+from .config import HORIZONS
+
+class Extremes(object):
+    # lowest and highest temperature, wind speed and coded weather condition over the hours of a horizon
+    __slots__ = ('horizon', 'minTemp', 'maxTemp', 'minWind', 'maxWind', 'minFct', 'maxFct')
+
+    def __init__(self, horizon, minTemp, maxTemp, minWind, maxWind, minFct, maxFct):
+        self.horizon = horizon
+        self.minTemp = minTemp
+        self.maxTemp = maxTemp
+        self.minWind = minWind
+        self.maxWind = maxWind
+        self.minFct = minFct
+        self.maxFct = maxFct
+
+    def __repr__(self):
+        return ('Extremes(horizon=' + str(self.horizon) + ', temp=' + str((self.minTemp, self.maxTemp)) + ', wind='
+                + str((self.minWind, self.maxWind)) + ', fct=' + str((self.minFct, self.maxFct)) + ')')
+
+def aggregateHorizons(series, horizons=HORIZONS):
+    # extremes over hours 1 to h of the series for each horizon h - horizons longer than the series are cut to the hours
+    # it holds
+    if not horizons or min(horizons) < 1:
+        raise ValueError('horizons must be one hour or longer')
+    last = min(max(horizons), len(series) - 1)
+    if last < 1:
+        raise ValueError('the series holds no upcoming hours')
+
+    # running extremes at the end of each segment, keyed by the last hour of the horizon
+    temp, wind, fct = series.temp, series.wind, series.fct
+    running = {}
+    extremes = None
+    start = 1
+    for end in sorted(set(min(horizon, last) for horizon in horizons)):
+        segment = slice(start, end + 1)
+        segmentTemp, segmentWind, segmentFct = temp[segment], wind[segment], fct[segment]
+        segmentExtremes = (min(segmentTemp), max(segmentTemp), min(segmentWind), max(segmentWind), min(segmentFct),
+                           max(segmentFct))
+        if extremes is None:
+            extremes = segmentExtremes
+        else:
+            extremes = (min(extremes[0], segmentExtremes[0]), max(extremes[1], segmentExtremes[1]),
+                        min(extremes[2], segmentExtremes[2]), max(extremes[3], segmentExtremes[3]),
+                        min(extremes[4], segmentExtremes[4]), max(extremes[5], segmentExtremes[5]))
+        running[end] = extremes
+        start = end + 1
+
+    return [Extremes(horizon, *running[min(horizon, last)]) for horizon in horizons]
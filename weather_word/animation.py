@@ -0,0 +1,135 @@
+# weather_word/animation.py
+#
+# Frame-scheduled animation engine. Effects are written as frame generators: each one is primed with next() and then
+# sent the elapsed time of the animation in seconds for every frame, and sets the pixels of that frame on the strip.
+# The Animator drives a generator at a fixed target frame rate with a single strip.show() per frame, so the length of a
+# transition no longer depends on the number of pixels and the caller is free between frames.
+
+import time
+import math
+import random
+
+from .config import ANIMATION_FPS
+from .metrics import STAGE_SECONDS, FPS_ACHIEVED, FRAMES_SHOWN, FRAMES_DROPPED
+
+class Animator(object):
+    # drives frame generators on a strip at a target frame rate and keeps frame statistics
+
+    def __init__(self, strip, fps=ANIMATION_FPS, clock=time.monotonic):
+        self.strip = strip
+        self.fps = fps
+        self.clock = clock
+        self.frames = None
+        self.duration = 0
+        self.startTime = 0
+        self.nextFrameTime = 0
+        self.animationFrames = 0
+        self.framesShown = 0
+        self.framesDropped = 0
+        self.busyTime = 0.0
+        self.playTime = 0.0
+
+    def play(self, frames, duration):
+        # start a frame generator that runs for duration seconds (the first frame is due immediately)
+        next(frames)
+        self.frames = frames
+        self.duration = duration
+        self.startTime = self.nextFrameTime = self.clock()
+        self.animationFrames = 0
+
+    def busy(self):
+        return self.frames is not None
+
+    def tick(self):
+        # render the next frame when it is due - returns the seconds until the following frame is due, or None once
+        # the animation has finished
+        if self.frames is None:
+            return None
+        now = self.clock()
+        if now < self.nextFrameTime:
+            return self.nextFrameTime - now
+        # count the frame slots that were missed because the caller (or a slow frame) ran late
+        missed = int((now - self.nextFrameTime) * self.fps)
+        self.framesDropped += missed
+        if missed:
+            FRAMES_DROPPED.inc(missed)
+        self.nextFrameTime += (missed + 1) / float(self.fps)
+        elapsed = min(now - self.startTime, self.duration)
+        self.frames.send(elapsed)
+        showStart = self.clock()
+        self.strip.show()
+        shown = self.clock()
+        STAGE_SECONDS.observe(shown - showStart, stage='show')
+        FRAMES_SHOWN.inc()
+        self.framesShown += 1
+        self.animationFrames += 1
+        self.busyTime += shown - now
+        if elapsed >= self.duration:
+            self.frames.close()
+            self.frames = None
+            playTime = self.clock() - self.startTime
+            self.playTime += playTime
+            if playTime > 0:
+                FPS_ACHIEVED.observe(self.animationFrames / playTime)
+            return None
+        return max(0.0, self.nextFrameTime - self.clock())
+
+    def run(self, frames, duration, sleep=time.sleep):
+        # play a frame generator to completion, sleeping between frames
+        self.play(frames, duration)
+        wait = self.tick()
+        while wait is not None:
+            sleep(wait)
+            wait = self.tick()
+
+    def actualFps(self):
+        # frames per second achieved over the finished animations
+        return self.framesShown / self.playTime if self.playTime else 0.0
+
+    def stats(self):
+        # frame statistics - load is the share of animation time spent rendering and showing frames
+        return {'target_fps': self.fps, 'actual_fps': round(self.actualFps(), 1), 'frames': self.framesShown,
+                'dropped': self.framesDropped, 'load': round(self.busyTime / self.playTime, 3) if self.playTime else 0.0}
+
+def wipeFrames(strip, colors, duration, indices=None):
+    # reveal colors across the strip in pixel order over duration seconds (only the given pixel indices when set)
+    if indices is None:
+        indices = range(len(colors))
+    shown = 0
+    count = len(indices)
+    while True:
+        elapsed = yield
+        target = count if elapsed >= duration else int(math.ceil(count * elapsed / duration))
+        for k in range(shown, target):
+            i = indices[k]
+            strip.setPixelColor(i, colors[i])
+        shown = max(shown, target)
+
+def shuffleFrames(strip, onColor, offColor, onRatio, period):
+    # repeatedly shuffle a fixed share of lit pixels and wipe each shuffle across the strip over period seconds
+    count = strip.numPixels()
+    lit = int(onRatio * count)
+    colors = [offColor] * (count - lit) + [onColor] * lit
+    cycle = -1
+    shown = 0
+    while True:
+        elapsed = yield
+        if int(elapsed // period) != cycle:
+            cycle = int(elapsed // period)
+            random.shuffle(colors)
+            shown = 0
+        target = int(math.ceil(count * (elapsed - cycle * period) / period))
+        for i in range(shown, min(target, count)):
+            strip.setPixelColor(i, colors[i])
+        shown = max(shown, target)
+
+def rainbowFrames(strip, track, cycleTime):
+    # rotate the 256 rainbow colors across all pixels at once, one full rotation every cycleTime seconds
+    # track is the color wheel unrolled over 256 + numPixels() positions (see palette.RAINBOW_TRACK)
+    count = strip.numPixels()
+    setPixelColor = strip.setPixelColor
+    while True:
+        elapsed = yield
+        j = int(256 * elapsed / cycleTime) & 255
+        for i in range(count):
+            setPixelColor(i, track[i + j])
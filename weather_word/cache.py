@@ -0,0 +1,63 @@
+# weather_word/cache.py
+#
+# On-disk cache of the last forecast response, kept next to log.txt. The payload is stored with the url it was fetched
+# from, the time it was fetched and its ETag and Last-Modified validators (so an expired response can still be
+# revalidated with a conditional request), and is written atomically so a power cut can never leave a partial file
+# behind. Workers fetching other queries in the same process (see displays.py) each keep their own cache file.
+
+import os
+import json
+import time
+
+from .config import PATH_NAME, CACHE_FILE, CACHE_TTL
+
+def cachePath(name=None):
+    # path of the cache file name (CACHE_FILE by default) under PATH_NAME
+    return PATH_NAME + (name or CACHE_FILE)
+
+def saveCachedForecast(url, obj, fetchedAt=None, etag=None, lastModified=None, name=None):
+    # write the response to a temporary file and move it over the cache file
+    path = cachePath(name)
+    entry = {'url': url, 'fetchedAt': fetchedAt if fetchedAt is not None else time.time(), 'payload': obj,
+             'etag': etag, 'lastModified': lastModified}
+    tempPath = path + '.tmp'
+    with open(tempPath, 'w') as cacheFile:
+        json.dump(entry, cacheFile)
+        cacheFile.flush()
+        os.fsync(cacheFile.fileno())
+    os.replace(tempPath, path)
+
+def discardCachedForecast(name=None):
+    # remove the cache file, for example when its response could not be parsed
+    try:
+        os.remove(cachePath(name))
+    except OSError:
+        pass
+
+def loadCacheEntry(url, name=None):
+    # return the cache entry for url whatever its age - a dict with the payload, fetchedAt, etag and lastModified -
+    # or None when there is none
+    try:
+        with open(cachePath(name), 'r') as cacheFile:
+            entry = json.load(cacheFile)
+        entry['fetchedAt'] = float(entry['fetchedAt'])
+        if entry['url'] != url or 'payload' not in entry:
+            return None
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    entry.setdefault('etag', None)
+    entry.setdefault('lastModified', None)
+    return entry
+
+def loadCachedForecast(url, ttl=CACHE_TTL, now=None, name=None):
+    # return the cached response and the time it was fetched if it is for url and younger than ttl seconds,
+    # otherwise None
+    if ttl <= 0:
+        return None
+    entry = loadCacheEntry(url, name)
+    if entry is None:
+        return None
+    age = (now if now is not None else time.time()) - entry['fetchedAt']
+    if not 0 <= age < ttl:
+        return None
+    return entry['payload'], entry['fetchedAt']
@@ -0,0 +1,68 @@
+# weather_word/capture.py
+#
+# Captures of the raw api responses. In record mode (RECORD_RESPONSES or the WEATHER_WORD_RECORD environment variable)
+# fetchWeatherData() appends every response it receives to captures.jsonl under PATH_NAME, one JSON object per line
+# holding the time of the request, the query, the latency, the status and the decompressed body exactly as the api sent
+# it. The file is rotated by size like the log. The captures are played back by replay.py.
+
+import os
+import json
+
+from .config import PATH_NAME, RECORD_RESPONSES, CAPTURE_FILE, CAPTURE_MAX_BYTES, CAPTURE_BACKUPS
+from .log import rotateFile
+
+def recordingEnabled():
+    # True when the api responses are to be captured (WEATHER_WORD_RECORD=1 environment variable or RECORD_RESPONSES)
+    value = os.environ.get('WEATHER_WORD_RECORD')
+    if value is None:
+        return RECORD_RESPONSES
+    return value.strip().lower() not in ('', '0', 'false', 'no', 'off')
+
+def capturePath():
+    return PATH_NAME + CAPTURE_FILE
+
+def urlQuery(url):
+    # the query of a Weather Underground url (the part between /q/ and .json) - the api key is not captured
+    # urls of other providers, which carry no key, are kept whole
+    query = url.split('/q/', 1)[-1]
+    return query[:-len('.json')] if query.endswith('.json') else query
+
+def captureEntry(url, requestedAt, latency, status, body, provider=None):
+    # capture of one response - body is the decompressed response (bytes), or None when there was none (304)
+    # provider is the name of the provider that requested it (None for Weather Underground)
+    entry = {'time': round(requestedAt, 3), 'query': urlQuery(url), 'latency': round(latency, 4), 'status': status,
+             'body': None if body is None else body.decode('utf8', 'replace')}
+    if provider is not None:
+        entry['provider'] = provider
+    return entry
+
+def appendCapture(entry, path=None, maxBytes=CAPTURE_MAX_BYTES, backups=CAPTURE_BACKUPS):
+    # append a capture to the capture file, rotating it first once it has grown past maxBytes
+    if path is None:
+        path = capturePath()
+    line = (json.dumps(entry, separators=(',', ':')) + '\n').encode('utf8')
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        size = 0
+    if size and size + len(line) > maxBytes:
+        rotateFile(path, backups)
+    with open(path, 'ab') as captureFile:
+        captureFile.write(line)
+
+def readCaptures(path=None):
+    # yield (line number, capture) for each line of a capture file - lines that are not a capture yield (line number,
+    # None) so that they can be reported
+    if path is None:
+        path = capturePath()
+    with open(path, 'rb') as captureFile:
+        for number, line in enumerate(captureFile, 1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line.decode('utf8'))
+            except ValueError:
+                entry = None
+            if not isinstance(entry, dict) or 'status' not in entry:
+                entry = None
+            yield number, entry
@@ -0,0 +1,70 @@
+# weather_word/config.py
+#
+# Configuration constants for the LED strip, the weather api and the display timing.
+
+# LED strip configuration:
+LED_COUNT      = 286                # Total number of LED pixels.
+LED_PIN        = 18                 # GPIO pin connected to the pixels (must support PWM!).
+LED_FREQ_HZ    = 800000             # LED signal frequency in hertz (usually 800khz)
+LED_DMA        = 5                  # DMA channel to use for generating signal (try 5)
+LED_BRIGHTNESS = 85                 # CAUTION - SETTING VALUE BEYOND 85 COULD PULL CURRENT (AMPS) BEYOND HARDWARE DESIGN - Set to 0 for darkest and 255 for brightest
+LED_INVERT     = False              # True to invert the signal (when using NPN transistor level shift)
+STRIP_BACKEND  = 'neopixel'         # 'neopixel' for the LED hardware or 'simulated' for an in-memory strip (override with WEATHER_WORD_STRIP)
+SIMULATED_WIRE_TIME = False         # True to have the simulated strip wait out the WS2812 transfer time on each show()
+SIMULATED_FRAME_HISTORY = 64        # number of most recent frames kept by the simulated strip
+DIFF_UPDATES   = True               # True to only send changed pixels to the strip and skip show() when nothing changed
+
+# other constants
+PATH_NAME = "//home//pi//weather_word//"  # set path to find apiboot.txt, log.txt and the forecast cache files
+API_BASE_URL = "http://api.wunderground.com/api/"  # base url of the weather api (WEATHER_WORD_API_URL overrides it)
+PROVIDER = "wunderground"           # weather provider - 'wunderground', 'open-meteo' or 'mock' (WEATHER_WORD_PROVIDER overrides it)
+OPEN_METEO_URL = "https://api.open-meteo.com/v1/forecast"  # url of the Open-Meteo api (WEATHER_WORD_OPEN_METEO_URL overrides it)
+TIME_BETWEEN_CALLS = 900            # time in seconds between calls to the weather api
+FETCH_DEADLINE = 30                 # time in seconds one attempt to fetch weather data may take in total
+CONNECT_TIMEOUT = 10                # time in seconds to look up the api host and connect to it
+READ_TIMEOUT = 20                   # time in seconds to send the request and read the whole response
+DECODE_TIMEOUT = 5                  # time in seconds to decompress and parse the response
+HEDGE_ENDPOINTS = ""                # secondary endpoints asked when the provider is slow, e.g. "open-meteo@25.77,-80.19" (WEATHER_WORD_HEDGE overrides it)
+HEDGE_INITIAL_DELAY = 2.0           # time in seconds to wait for the provider before asking the next endpoint, until its latency is known
+HEDGE_MIN_DELAY = 0.5               # shortest time in seconds to wait for the provider before asking the next endpoint
+HEDGE_PERCENTILE = 0.95             # percentile of the recent provider latencies waited for before asking the next endpoint
+HEDGE_HISTORY = 50                  # number of recent provider latencies the hedge delay is taken from
+HEDGE_MIN_SAMPLES = 5               # number of provider latencies needed before the percentile replaces HEDGE_INITIAL_DELAY
+TIME_BETWEEN_FAILED = 300           # maximum time in seconds between failed calls to the weather api
+RETRY_BASE_DELAY = 15               # time in seconds before the first retry of a failed call, doubling with each further failure
+RETRY_JITTER = 0.5                  # largest share of each retry delay taken off at random
+LOG_FILE = "log.txt"                # file under PATH_NAME the log is written to, one JSON object per line
+LOG_LEVEL = "INFO"                  # log level - DEBUG adds the response payloads and frame pixels (WEATHER_WORD_LOG_LEVEL overrides it)
+LOG_MAX_BYTES = 262144              # size in bytes at which the log file is rotated
+LOG_BACKUPS = 2                     # number of rotated log files kept (log.txt.1, log.txt.2)
+LOG_BUFFER_CAPACITY = 200           # log records held in memory before they are written without waiting for the end of the cycle
+METRICS_FILE = ""                   # file the metrics are written to after every fetch cycle in the Prometheus text format, under PATH_NAME unless absolute - best on a tmpfs, e.g. "/run/weather_word.prom" ("" to disable, WEATHER_WORD_METRICS_FILE overrides it)
+METRICS_PORT = 0                    # port serving the metrics on /metrics (0 to disable, WEATHER_WORD_METRICS_PORT overrides it)
+METRICS_HOST = "127.0.0.1"          # address the metrics endpoint listens on ("0.0.0.0" to let the fleet scrape it)
+PROFILE_CYCLES = 3                  # display cycles profiled after SIGUSR1 (WEATHER_WORD_PROFILE=n profiles the first n cycles after startup)
+PROFILE_MODES = "cprofile,sampler,tracemalloc"  # profilers run in a session (WEATHER_WORD_PROFILE_MODES overrides it)
+PROFILE_SAMPLE_INTERVAL = 0.01      # time in seconds between the stack samples of the sampler
+PROFILE_TRACE_FRAMES = 5            # frames of each allocation traceback kept by tracemalloc
+PROFILE_MAX_BYTES = 131072          # size in bytes at which each profile report under PATH_NAME is cut
+PROFILE_BACKUPS = 3                 # number of older profile reports kept (profile_cprofile.txt.1, ...)
+PROFILE_TOP = 40                    # functions and allocation sites listed in each profile report
+CACHE_FILE = "forecast_cache.json"   # file under PATH_NAME holding the last forecast response
+DISPLAYS_FILE = "displays.txt"      # file under PATH_NAME listing the displays to drive from one process, if present (WEATHER_WORD_DISPLAYS overrides its path)
+FETCH_THREADS = 2                   # threads fetching the forecasts of the displays in turn, each keeping one connection to each host
+CACHE_TTL = 900                     # time in seconds a cached forecast response is used before fetching again (0 to disable)
+RECORD_RESPONSES = False            # True to append every api response to CAPTURE_FILE for replay (WEATHER_WORD_RECORD=1 also enables it)
+CAPTURE_FILE = "captures.jsonl"     # file under PATH_NAME the api responses are captured to, one JSON object per line
+CAPTURE_MAX_BYTES = 67108864        # size in bytes at which the capture file is rotated
+CAPTURE_BACKUPS = 3                 # number of rotated capture files kept (captures.jsonl.1, ...)
+OBJMAX = 19                         # set max number of objects to parse from weather data
+HORIZONS = (OBJMAX - 1,)            # hours ahead covered by each upcoming low and high frame pair, e.g. (3, 6, 12, 18) (at most OBJMAX - 1)
+RAINBOW_BOOT_ITERATIONS = 8         # set iterations to correspond to Pi boot time and ensure wifi connectivity
+MAX_FAIL_LOOP_COUNT = 10            # consecutive failed attempts to retrieve data from API before the circuit opens
+CIRCUIT_OPEN_TIME = 1800            # time in seconds the open circuit holds back calls before a single probe call
+FRAME_CACHE_SIZE = 512              # maximum number of built frames kept in memory for reuse across forecasts
+ANIMATION_FPS = 30                  # target frame rate in frames per second for wipes and the rainbow animation
+FRAME_HOLD_TIME = 20                # time in seconds each frame of weather words stays on the display
+WIPE_TIME = 3.0                     # time in seconds to wipe a new frame of words across the display
+SHUFFLE_TIME = 1.2                  # time in seconds to wipe each shuffle of pixels across the display when signaling errors
+RAINBOW_CYCLE_TIME = 3.0            # time in seconds for one full rotation of the rainbow boot animation
+USE_NUMPY = True                    # True to compute the effects on a NumPy framebuffer when numpy is installed
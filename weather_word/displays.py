@@ -0,0 +1,173 @@
+# weather_word/displays.py
+#
+# Several displays driven from one process. When displays.txt is found under PATH_NAME (or at the path set with the
+# WEATHER_WORD_DISPLAYS environment variable) the program reads one display from each line instead of the query lines
+# of apiboot.txt, which still holds the api key:
+#   query units [backend[:pin[:dma]]]
+# for example
+#   FL/Miami    english  neopixel:18:10
+#   NY/New_York english  neopixel:13:11
+#   FL/Miami    metric   simulated
+# Each strip needs its own GPIO pin and DMA channel. The displays share one FetchPool: displays asking for the same
+# forecast url share one worker and cache file, and displays with the same url and units share one slot, so the
+# response is fetched and parsed once and their frames (and the frame cache of render.py) are held once. The workers
+# are spread over FETCH_THREADS threads that run their fetch cycles in turn, so however many locations are shown the
+# pool holds a bounded number of threads and clients, and the workers of a thread share its kept-alive connection to
+# each host.
+
+import os
+import time
+import hashlib
+import logging
+import threading
+
+from .config import PATH_NAME, DISPLAYS_FILE, FETCH_THREADS, LED_PIN, LED_DMA
+from .fetch import readApiBootFile
+from .providers import createProvider
+from .hedge import createHedgePool
+from .httpclient import HttpClient
+from .worker import ForecastSlot, FetchWorker
+from .log import flushLog
+
+UNITS = ('english', 'metric')
+
+logger = logging.getLogger(__name__)
+
+def displaysPath():
+    return os.environ.get('WEATHER_WORD_DISPLAYS', PATH_NAME + DISPLAYS_FILE)
+
+class DisplayEntry(object):
+    # one display of displays.txt - the query and units it shows and the strip it is shown on (backend None for the
+    # configured one)
+
+    def __init__(self, name, query, units, backend=None, pin=LED_PIN, dma=LED_DMA):
+        self.name = name
+        self.query = query
+        self.units = units
+        self.backend = backend
+        self.pin = pin
+        self.dma = dma
+
+def parseDisplayLine(name, line):
+    # display of a query units [backend[:pin[:dma]]] line
+    parts = line.split()
+    if len(parts) not in (2, 3):
+        raise ValueError('expected "query units [backend[:pin[:dma]]]", got "' + line + '"')
+    if parts[1] not in UNITS:
+        raise ValueError('unknown units "' + parts[1] + '" - expected one of ' + str(UNITS))
+    strip = parts[2].split(':') if len(parts) == 3 else [None]
+    if len(strip) > 3:
+        raise ValueError('expected backend[:pin[:dma]], got "' + parts[2] + '"')
+    pin = int(strip[1]) if len(strip) > 1 else LED_PIN
+    dma = int(strip[2]) if len(strip) > 2 else LED_DMA
+    return DisplayEntry(name, parts[0], parts[1], strip[0] or None, pin, dma)
+
+def readDisplaysFile(path=None):
+    # the displays listed in the displays file, named display1, display2, ... in their order - None when there is no
+    # such file; lines starting with '#' are comments
+    if path is None:
+        path = displaysPath()
+    if not os.path.exists(path):
+        return None
+    entries = []
+    with open(path, 'r') as displaysFile:
+        for number, line in enumerate(displaysFile, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                entries.append(parseDisplayLine('display' + str(len(entries) + 1), line))
+            except ValueError as e:
+                raise ValueError(path + ' line ' + str(number) + ': ' + str(e))
+    return entries
+
+class FetchThread(threading.Thread):
+    # runs the fetch cycles of its workers in turn, each when it is due, over one client and one hedging thread pool
+
+    def __init__(self, number):
+        threading.Thread.__init__(self, name='fetch-thread-' + str(number))
+        self.daemon = True
+        self.client = HttpClient()
+        self.hedgePool = createHedgePool()
+        self.workers = []
+        self.stopping = threading.Event()
+
+    def stop(self):
+        self.stopping.set()
+
+    def run(self):
+        active = list(self.workers)
+        try:
+            while active:
+                worker = min(active, key=lambda worker: worker.nextFetchTime)
+                if self.stopping.wait(max(0, worker.nextFetchTime - time.time())):
+                    return
+                try:
+                    if worker.runCycle():
+                        continue
+                except Exception as e:
+                    # the other workers of the thread keep fetching
+                    worker.fail(e)
+                active.remove(worker)
+        finally:
+            self.client.close()
+            for worker in self.workers:
+                if worker.hedger is not None:
+                    worker.hedger.close()
+            if self.hedgePool is not None:
+                self.hedgePool.shutdown(wait=False)
+            flushLog()
+
+class FetchPool(object):
+    # fetch workers shared by the displays - one for each distinct forecast url, with one slot for each url and units,
+    # run by a bounded number of fetch threads
+
+    def __init__(self, provider=None, threads=FETCH_THREADS):
+        self.provider = provider or createProvider()
+        self.threads = [FetchThread(number) for number in range(1, threads + 1)]
+        self.workers = {}               # forecast url -> worker
+        self.slots = {}                 # (forecast url, units) -> slot
+
+    def subscribe(self, query, units):
+        # slot the forecast of query in units is published into
+        try:
+            key = readApiBootFile()[0]
+        except Exception:
+            # the workers report the missing api key on the displays
+            key = None
+        url = self.provider.url([key, query, units])
+        slot = self.slots.get((url, units))
+        if slot is not None:
+            return slot
+        slot = ForecastSlot()
+        self.slots[(url, units)] = slot
+        worker = self.workers.get(url)
+        if worker is None:
+            # the cache file is named after the url, so a worker finds its own response again after a restart
+            cacheName = 'forecast_cache_' + hashlib.sha1(url.encode('utf8')).hexdigest()[:12] + '.json'
+            thread = self.threads[len(self.workers) % len(self.threads)]
+            worker = FetchWorker(slot, provider=self.provider, query=(query, units), cacheName=cacheName,
+                                 client=thread.client, hedgePool=thread.hedgePool)
+            thread.workers.append(worker)
+            self.workers[url] = worker
+        else:
+            worker.addSlot(units, slot)
+        return slot
+
+    def start(self):
+        # publish the still-fresh cached forecasts and start the fetch threads - returns the slots that got a cached
+        # forecast
+        warm = set()
+        for worker in self.workers.values():
+            if worker.warmStart():
+                warm.update(worker.slots())
+        started = [thread for thread in self.threads if thread.workers]
+        for thread in started:
+            thread.start()
+        logger.info('Started fetch workers.', extra={'data': {'workers': len(self.workers), 'threads': len(started),
+                                                               'slots': len(self.slots)}})
+        return warm
+
+    def stop(self):
+        for thread in self.threads:
+            thread.stop()
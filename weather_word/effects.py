@@ -0,0 +1,65 @@
+# weather_word/effects.py
+#
+# Display effects - color wipes, the rainbow boot animation and the wipe used to display the weather words. Each effect
+# runs as a frame generator on an Animator (a new one for the strip unless one is passed in to collect frame statistics).
+# Colors are packed colors, usually taken from palette.py. When numpy is installed the rainbow, the shuffle and the wipe
+# of the weather words are computed on a FrameBuffer instead (see framebuffer.py).
+
+from .config import LED_COUNT, TIME_BETWEEN_FAILED, RAINBOW_BOOT_ITERATIONS, RAINBOW_CYCLE_TIME, WIPE_TIME, SHUFFLE_TIME
+from .palette import WHEEL, RAINBOW_TRACK, OFF, FRAME_COLORS
+from .animation import Animator, wipeFrames, shuffleFrames, rainbowFrames
+from .metrics import STAGE_SECONDS
+from . import framebuffer
+
+def frameBuffer(strip):
+    # framebuffer for the effects on the strip, or None when the effects run without numpy
+    return framebuffer.FrameBuffer(strip.numPixels()) if framebuffer.available() else None
+
+def colorWipe(strip, color, duration=WIPE_TIME, animator=None):
+    # wipe color across display a pixel at a time
+    colors = [color] * strip.numPixels()
+    (animator or Animator(strip)).run(wipeFrames(strip, colors, duration), duration)
+
+def colorWipeRand(strip, color, duration=TIME_BETWEEN_FAILED, animator=None):
+    # shuffles pixels on and off and wipes color across display for a set period of time
+    # 95% of the pixels are turned on and each shuffle is wiped across the display over SHUFFLE_TIME seconds
+    buffer = frameBuffer(strip)
+    if buffer is not None:
+        frames = framebuffer.shuffleFrames(strip, buffer, color, OFF, 0.95, SHUFFLE_TIME)
+    else:
+        frames = shuffleFrames(strip, color, OFF, 0.95, SHUFFLE_TIME)
+    (animator or Animator(strip)).run(frames, duration)
+
+def wheel(pos):
+    # generate rainbow colors across 0-255 positions
+    return WHEEL[pos]
+
+def rainbow(strip, iterations=RAINBOW_BOOT_ITERATIONS, animator=None):
+    # draw rainbow that fades across all pixels at once, one full rotation every RAINBOW_CYCLE_TIME seconds
+    duration = iterations * RAINBOW_CYCLE_TIME
+    buffer = frameBuffer(strip)
+    if buffer is not None:
+        frames = framebuffer.rainbowFrames(strip, buffer, RAINBOW_CYCLE_TIME)
+    else:
+        frames = rainbowFrames(strip, RAINBOW_TRACK, RAINBOW_CYCLE_TIME)
+    (animator or Animator(strip)).run(frames, duration)
+
+def pixelWipe(strip, pixelData, duration=WIPE_TIME, animator=None):
+    # wipe pixel values across entire display one pixel at a time to display the weather words
+    # on a DiffStrip only the pixels that differ from the displayed frame are wiped, and nothing when none differ
+    with STAGE_SECONDS.time(stage='wipe'):
+        buffer = frameBuffer(strip)
+        if buffer is not None:
+            colors = buffer.frameColors(pixelData, FRAME_COLORS[1], FRAME_COLORS[0])
+            pixels = colors.tolist()
+        else:
+            bits = pixelData.bits
+            pixels = [FRAME_COLORS[(bits >> i) & 1] for i in range(LED_COUNT)]
+        indices = strip.changedPixels(pixels) if hasattr(strip, 'changedPixels') else None
+        if indices == []:
+            return
+        if buffer is not None:
+            frames = framebuffer.wipeFrames(strip, buffer, colors, duration, indices)
+        else:
+            frames = wipeFrames(strip, pixels, duration, indices)
+        (animator or Animator(strip)).run(frames, duration)
@@ -0,0 +1,172 @@
+# weather_word/extract.py
+#
+# Streaming extraction of the forecast from the api response. The response is fed to a ForecastExtractor chunk by chunk
+# as it arrives; the top level of the JSON document is scanned incrementally, each hour of hourly_forecast is decoded on
+# its own and only the fields the display uses are kept, and reading stops once the first OBJMAX hours are in. Memory
+# and parse time so depend on the number of hours used rather than on the size of the response. Responses that cannot
+# be read hour by hour (such as the columnar Open-Meteo response) are decoded whole by a DocumentExtractor instead.
+
+import json
+import codecs
+
+from .config import OBJMAX
+
+HOUR_FIELDS = ('temp', 'humidity', 'wspd', 'fctcode', 'FCTTIME')     # fields of each hour kept (of FCTTIME only civil)
+WHITESPACE = ' \t\n\r'
+
+DECODER = json.JSONDecoder()
+
+def projectHour(hour, fields=HOUR_FIELDS):
+    # the given fields of one hour of forecast, in the shape of the api response
+    projected = dict((name, hour[name]) for name in fields if name in hour and name != 'FCTTIME')
+    if 'FCTTIME' in fields and isinstance(hour.get('FCTTIME'), dict) and 'civil' in hour['FCTTIME']:
+        projected['FCTTIME'] = {'civil': hour['FCTTIME']['civil']}
+    return projected
+
+class ForecastExtractor(object):
+    # incremental parser of the api response keeping response (and its error) and the first hours of hourly_forecast
+
+    def __init__(self, hours=OBJMAX, fields=HOUR_FIELDS):
+        self.hours = hours
+        self.fields = fields
+        self.textDecoder = codecs.getincrementaldecoder('utf8')()
+        self.buffer = ''
+        self.pos = 0
+        self.state = 'start'
+        self.key = None
+        self.response = None
+        self.forecast = None
+        self.done = False
+        self.bytesFed = 0
+
+    def feed(self, data):
+        # parse a chunk of the response - returns True once nothing more of it is needed
+        if self.done:
+            return True
+        self.bytesFed += len(data)
+        self.buffer = self.buffer[self.pos:] + self.textDecoder.decode(data)
+        self.pos = 0
+        self.parse(False)
+        return self.done
+
+    def close(self):
+        # finish parsing once the whole response was fed (or nothing more was needed) and return the extracted
+        # response in the shape of the api response - raises ValueError when it is not valid JSON
+        if not self.done:
+            self.buffer = self.buffer[self.pos:] + self.textDecoder.decode(b'', True)
+            self.pos = 0
+            self.parse(True)
+            if not self.done:
+                raise ValueError('response ended in the middle of the document')
+        self.buffer = ''
+        obj = {}
+        if self.response is not None:
+            obj['response'] = self.response
+        if self.forecast is not None:
+            obj['hourly_forecast'] = self.forecast
+        return obj
+
+    def decodeValue(self, final):
+        # decode the JSON value at pos - returns (True, value), or (False, None) when more of the response is needed
+        try:
+            value, end = DECODER.raw_decode(self.buffer, self.pos)
+        except ValueError:
+            if final:
+                raise
+            return False, None
+        if end == len(self.buffer) and not final and not isinstance(value, (dict, list, str)):
+            # a number (or literal) at the end of the buffer may continue in the next chunk
+            return False, None
+        self.pos = end
+        return True, value
+
+    def parse(self, final):
+        # advance through the document as far as the buffered text allows
+        buffer = self.buffer
+        while not self.done:
+            while self.pos < len(buffer) and buffer[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos >= len(buffer):
+                return
+            state = self.state
+            char = buffer[self.pos]
+            if state == 'start':
+                self.expect(char, '{')
+                self.state = 'key'
+            elif state == 'key':
+                if char == '}':
+                    self.done = True
+                    continue
+                complete, key = self.decodeValue(final)
+                if not complete:
+                    return
+                if not isinstance(key, str):
+                    raise ValueError('expected a key at position ' + str(self.pos))
+                self.key = key
+                self.state = 'colon'
+            elif state == 'colon':
+                self.expect(char, ':')
+                self.state = 'value'
+            elif state == 'value':
+                if self.key == 'hourly_forecast' and char == '[':
+                    self.pos += 1
+                    self.forecast = []
+                    self.state = 'hour'
+                    continue
+                complete, value = self.decodeValue(final)
+                if not complete:
+                    return
+                if self.key == 'response':
+                    self.response = value
+                self.state = 'next key'
+            elif state == 'next key':
+                if char == '}':
+                    self.done = True
+                    continue
+                self.expect(char, ',')
+                self.state = 'key'
+            elif state == 'hour':
+                if char == ']':
+                    self.pos += 1
+                    self.state = 'next key'
+                    continue
+                complete, hour = self.decodeValue(final)
+                if not complete:
+                    return
+                self.forecast.append(projectHour(hour, self.fields) if isinstance(hour, dict) else hour)
+                if len(self.forecast) >= self.hours:
+                    self.done = True
+                    continue
+                self.state = 'next hour'
+            elif state == 'next hour':
+                if char == ']':
+                    self.pos += 1
+                    self.state = 'next key'
+                    continue
+                self.expect(char, ',')
+                self.state = 'hour'
+
+    def expect(self, char, expected):
+        if char != expected:
+            raise ValueError('expected ' + repr(expected) + ' at position ' + str(self.pos) + ' but found ' + repr(char))
+        self.pos += 1
+
+class DocumentExtractor(object):
+    # collects the whole response and decodes it at once - project(obj, hours) then keeps what is needed of it
+
+    def __init__(self, hours=OBJMAX, project=None):
+        self.hours = hours
+        self.project = project
+        self.chunks = []
+        self.bytesFed = 0
+
+    def feed(self, data):
+        self.chunks.append(data)
+        self.bytesFed += len(data)
+        return False
+
+    def close(self):
+        # decode the response - raises ValueError when it is not valid JSON
+        data, self.chunks = b''.join(self.chunks), []
+        obj = json.loads(data.decode('utf8'))
+        return self.project(obj, self.hours) if self.project is not None else obj
@@ -0,0 +1,161 @@
+# weather_word/fetch.py
+#
+# Reads the apiboot.txt file and fetches forecast data from the weather api. Each call of fetchWeatherData() makes a
+# single attempt and raises FetchError when it fails - retries are left to the retry policy of the fetch worker (see
+# retry.py and worker.py), so there is no separate connectivity check before the request. Requests to the api go
+# through an HttpClient (see httpclient.py) that keeps its connection open and revalidates responses, and each attempt
+# is bounded by a Deadline of FETCH_DEADLINE seconds split into connect, read and decode stages. The response is parsed
+# as it streams in and only the first OBJMAX hours of it are kept (see extract.py). In record mode the whole response is
+# read and appended to the capture file (see capture.py). Other weather apis plug in as providers (see providers.py),
+# which supply the extractor and the checks of their responses.
+
+import os
+import time
+import logging
+
+from .config import PATH_NAME, API_BASE_URL, OBJMAX
+from .httpclient import HttpClient, Deadline, DeadlineExceeded
+from .extract import ForecastExtractor
+from .capture import recordingEnabled, captureEntry, appendCapture
+
+WUNDERGROUND_ATTRIBUTION = 'Weather data provided by The Weather Underground, LLC (WUL)'
+
+logger = logging.getLogger(__name__)
+
+class FetchError(Exception):
+    # a failed attempt to fetch weather data - the message is written to log.txt
+    pass
+
+class FetchTimeout(FetchError):
+    # an attempt that ran out of time in one of its stages - stage is 'connect', 'read' or 'decode'
+
+    def __init__(self, stage):
+        FetchError.__init__(self, 'Timed out in the ' + stage + ' stage of the request to the API')
+        self.stage = stage
+
+def readApiBootFile():
+    # opens apiboot.txt file and reads the api key (obtain from weather underground) and one uncommented query line
+    # this function ignores the '#' in the file for comments
+    i = 0
+    a = [None]*3
+    textFile = open(PATH_NAME + "apiboot.txt", "r")
+    while i < 3:
+        a[i] = textFile.readline().rstrip('\n')
+        if a[i][0] != "#":
+            i += 1
+    textFile.close()
+    return a
+
+def apiUrl(apiVal, baseUrl=None):
+    # url of the hourly forecast for the api key and query read from the boot file
+    # the base url can be pointed at a stand-in server with the WEATHER_WORD_API_URL environment variable
+    if baseUrl is None:
+        baseUrl = os.environ.get('WEATHER_WORD_API_URL', API_BASE_URL)
+    return baseUrl + str(apiVal[0]) + "/hourly/q/" + str(apiVal[1]) + ".json"
+
+def recordingSink(extractor, chunks, errors):
+    # sink keeping every chunk of the response besides feeding it to the extractor, so the whole response is read and
+    # captured - a response the extractor cannot parse is still read to the end, with the error kept in errors
+    def sink(data):
+        chunks.append(data)
+        if not errors:
+            try:
+                extractor.feed(data)
+            except ValueError as e:
+                errors.append(e)
+        return False
+    return sink
+
+def fetchWeatherData(url, client=None, deadline=None, record=None, provider=None):
+    # make one attempt to fetch and verify weather data within the deadline - returns None when the api answered 304
+    # Not Modified to a conditional request, meaning the response the client holds validators for is still current
+    # the validators of a 200 response are only kept by the client once the response has been verified
+    # with record (by default when recordingEnabled()) the response is appended to the capture file
+    # the response is read by the extractor of the provider and checked by it (Weather Underground when None)
+    if deadline is None:
+        deadline = Deadline()
+    if record is None:
+        record = recordingEnabled()
+    if provider is None:
+        extractor = ForecastExtractor(OBJMAX)
+        attribution = WUNDERGROUND_ATTRIBUTION
+    else:
+        extractor = provider.newExtractor(OBJMAX)
+        attribution = provider.attribution
+    sink = extractor.feed
+    if record:
+        chunks = []
+        errors = []
+        sink = recordingSink(extractor, chunks, errors)
+        requestedAt = time.time()
+    try:
+        # attempt to fetch weather data
+        logger.debug('Requesting ' + str(url))
+        logger.info(attribution)
+        if client is None:
+            client = HttpClient()
+            try:
+                response = client.get(url, conditional=False, deadline=deadline, sink=sink)
+            finally:
+                client.close()
+        else:
+            response = client.get(url, deadline=deadline, sink=sink)
+    except DeadlineExceeded as e:
+        raise FetchTimeout(e.stage)
+    except Exception:
+        raise FetchError('Failed to connect to API')
+    if response.status == 200:
+        # the response the client held validators for has changed
+        client.setValidators(url, None, None)
+    if record:
+        body = b''.join(chunks) if response.status == 200 else response.body
+        try:
+            appendCapture(captureEntry(url, requestedAt, deadline.elapsed(), response.status, body or None,
+                                       provider.name if provider is not None else None))
+        except OSError as e:
+            logger.warning('Failed to write capture: ' + str(e))
+        if errors:
+            raise FetchError('Failed to connect to API')
+    if response.notModified():
+        deadline.endStage()
+        logger.info('Forecast not modified (HTTP 304).')
+        return None
+    if response.status != 200:
+        raise FetchError('Failed to connect to API (HTTP ' + str(response.status) + ')')
+    try:
+        obj = extractor.close()
+    except Exception:
+        raise FetchError('Failed to connect to API')
+    logger.info('Parsed the response.', extra={'data': {'bytes': extractor.bytesFed, 'wire_bytes': response.wireBytes}})
+    try:
+        deadline.timeout()
+    except DeadlineExceeded as e:
+        deadline.endStage()
+        raise FetchTimeout(e.stage)
+    deadline.endStage()
+    if provider is None:
+        verifyWeatherData(obj)
+    else:
+        provider.verify(obj)
+    etag, lastModified = response.validators()
+    client.setValidators(url, etag, lastModified)
+    return obj
+
+def verifyWeatherData(obj, checkTemp=True):
+    # raise FetchError unless obj is a response holding forecast data (with the temperature of the first hour unless
+    # checkTemp is False)
+    try:
+        # verify that API returned no errors
+        error = str(obj["response"]["error"]["type"])
+    except Exception:
+        pass
+    else:
+        raise FetchError('Received an error response from the API: "' + error + '"')
+
+    try:
+        # verify that API returned hourly forecast data
+        hour = obj["hourly_forecast"][0]
+        if checkTemp:
+            str(hour["temp"]["english"])
+    except Exception:
+        raise FetchError('API failed to provide forecast data')
@@ -0,0 +1,80 @@
+# weather_word/frame.py
+#
+# Compact representation of one display frame - the set of lit pixels in the 22 x 13 LED matrix.
+
+from .config import LED_COUNT
+
+class Frame(object):
+    # immutable set of lit pixels for one display frame, stored as an int bitmask (bit n is set when pixel n is lit)
+    __slots__ = ('bits',)
+
+    def __init__(self, bits=0):
+        if bits >> LED_COUNT:
+            raise ValueError('frame has pixels beyond LED_COUNT')
+        object.__setattr__(self, 'bits', bits)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Frame is immutable')
+
+    @classmethod
+    def fromIndices(cls, indices):
+        # build a frame from an iterable of lit pixel indices
+        bits = 0
+        for i in indices:
+            bits |= 1 << i
+        return cls(bits)
+
+    @classmethod
+    def fromPixels(cls, pixels):
+        # build a frame from the list form (one 0 or 1 per pixel)
+        return cls.fromIndices(i for i, value in enumerate(pixels) if value)
+
+    def __or__(self, other):
+        return Frame(self.bits | other.bits)
+
+    def __and__(self, other):
+        return Frame(self.bits & other.bits)
+
+    def __xor__(self, other):
+        return Frame(self.bits ^ other.bits)
+
+    def __eq__(self, other):
+        return isinstance(other, Frame) and self.bits == other.bits
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.bits)
+
+    def __bool__(self):
+        return self.bits != 0
+
+    def __len__(self):
+        # popcount - number of lit pixels
+        return bin(self.bits).count('1')
+
+    def __contains__(self, i):
+        return (self.bits >> i) & 1 == 1
+
+    def __iter__(self):
+        # iterate over the indices of lit pixels in ascending order
+        bits = self.bits
+        while bits:
+            low = bits & -bits
+            yield low.bit_length() - 1
+            bits ^= low
+
+    def pixel(self, i):
+        # value (0 or 1) of pixel i
+        return (self.bits >> i) & 1
+
+    def toList(self):
+        # expand into the list form (one 0 or 1 per pixel) used to display the weather words
+        bits = self.bits
+        return [(bits >> i) & 1 for i in range(LED_COUNT)]
+
+    def __repr__(self):
+        return 'Frame(' + str(list(self)) + ')'
+
+EMPTY_FRAME = Frame()
@@ -0,0 +1,138 @@
+# weather_word/framebuffer.py
+#
+# Optional NumPy framebuffer. The pixels of the display are held in a uint32 array of packed colors (a (13, 22) view is
+# available through grid()) and the effects are computed on the whole array at once, then flushed to the strip in one
+# pass. NumPy is not required - available() is False without it and the effects fall back to animation.py. It is
+# imported on first use so that importing the package stays cheap. Only functions found in the old NumPy releases of
+# Raspbian (1.12 on Stretch) are used.
+
+import math
+import importlib
+
+from .config import LED_COUNT, USE_NUMPY
+from .palette import RAINBOW_TRACK, OFF, WHITE
+
+MATRIX_ROWS = 13
+MATRIX_COLUMNS = 22
+
+numpy = None                        # numpy module once loaded, False when it is not installed
+
+def loadNumpy():
+    # import numpy on first use - returns None when it is not installed
+    global numpy
+    if numpy is None:
+        try:
+            numpy = importlib.import_module('numpy')
+        except ImportError:
+            numpy = False
+    return numpy or None
+
+def available():
+    # True when the framebuffer can be used by the effects
+    return USE_NUMPY and loadNumpy() is not None
+
+class FrameBuffer(object):
+    # packed colors of every pixel with vectorized versions of the display effects
+
+    def __init__(self, count=LED_COUNT):
+        if loadNumpy() is None:
+            raise ImportError('FrameBuffer requires numpy')
+        self.count = count
+        self.pixels = numpy.zeros(count, dtype=numpy.uint32)
+        self.track = numpy.array(RAINBOW_TRACK[:256 + count], dtype=numpy.uint32)
+
+    def grid(self):
+        # view of the pixels as rows and columns of the matrix
+        return self.pixels.reshape(MATRIX_ROWS, MATRIX_COLUMNS)
+
+    def fill(self, color):
+        self.pixels.fill(color)
+
+    def rainbow(self, j):
+        # rainbow rotation j (0-255) across all pixels
+        j &= 255
+        self.pixels[:] = self.track[j:j + self.count]
+
+    def frameMask(self, frame):
+        # boolean array of the lit pixels of a Frame
+        packed = numpy.frombuffer(frame.bits.to_bytes((self.count + 7) // 8, 'little'), dtype=numpy.uint8)
+        # unpackbits puts the highest bit of each byte first - reverse each byte to get the pixels in order
+        return numpy.unpackbits(packed).reshape(-1, 8)[:, ::-1].reshape(-1)[:self.count].astype(bool)
+
+    def frameColors(self, frame, onColor=WHITE, offColor=OFF):
+        # packed colors of a Frame of weather words - white words on black
+        return numpy.where(self.frameMask(frame), numpy.uint32(onColor), numpy.uint32(offColor)).astype(numpy.uint32)
+
+    def renderFrame(self, frame, onColor=WHITE, offColor=OFF):
+        self.pixels[:] = self.frameColors(frame, onColor, offColor)
+
+    def shuffleColors(self, onColor, offColor, onRatio, rng=None):
+        # packed colors with a random share of onRatio of the pixels lit - rng is a numpy RandomState or Generator,
+        # the global one of numpy.random by default
+        rng = rng or numpy.random
+        lit = rng.permutation(self.count) < int(onRatio * self.count)
+        return numpy.where(lit, numpy.uint32(onColor), numpy.uint32(offColor)).astype(numpy.uint32)
+
+    def scale(self, brightness):
+        # scale each 8-bit channel of every pixel by brightness (0 to 255)
+        channels = self.pixels.view(numpy.uint8).reshape(self.count, 4).astype(numpy.uint16)
+        channels = (channels * brightness // 255).astype(numpy.uint8)
+        self.pixels[:] = channels.reshape(-1).view(numpy.uint32)
+
+    def flush(self, strip, indices=None):
+        # write every pixel (or only the given pixel indices) to the strip in one pass
+        # a DiffStrip only passes on the pixels that changed
+        setPixelColor = strip.setPixelColor
+        if indices is not None:
+            for i, color in zip(indices.tolist(), self.pixels[indices].tolist()):
+                setPixelColor(i, color)
+            return
+        colors = self.pixels.tolist()
+        setPixels = getattr(strip, 'setPixels', None)
+        if setPixels is not None:
+            setPixels(colors)
+        else:
+            for i in range(self.count):
+                setPixelColor(i, colors[i])
+
+def wipeFrames(strip, buffer, colors, duration, indices=None):
+    # reveal the colors array across the strip in pixel order over duration seconds (only the given pixel indices
+    # when set)
+    if indices is None:
+        indices = numpy.arange(len(colors))
+    else:
+        indices = numpy.asarray(indices, dtype=numpy.intp)
+    shown = 0
+    count = len(indices)
+    while True:
+        elapsed = yield
+        target = count if elapsed >= duration else int(math.ceil(count * elapsed / duration))
+        if target > shown:
+            reveal = indices[shown:target]
+            buffer.pixels[reveal] = colors[reveal]
+            buffer.flush(strip, reveal)
+            shown = target
+
+def shuffleFrames(strip, buffer, onColor, offColor, onRatio, period, rng=None):
+    # repeatedly shuffle a fixed share of lit pixels and wipe each shuffle across the strip over period seconds
+    cycle = -1
+    shown = 0
+    colors = None
+    while True:
+        elapsed = yield
+        if int(elapsed // period) != cycle:
+            cycle = int(elapsed // period)
+            colors = buffer.shuffleColors(onColor, offColor, onRatio, rng)
+            shown = 0
+        target = min(buffer.count, int(math.ceil(buffer.count * (elapsed - cycle * period) / period)))
+        if target > shown:
+            buffer.pixels[shown:target] = colors[shown:target]
+            buffer.flush(strip, numpy.arange(shown, target))
+            shown = target
+
+def rainbowFrames(strip, buffer, cycleTime):
+    # rotate the 256 rainbow colors across all pixels at once, one full rotation every cycleTime seconds
+    while True:
+        elapsed = yield
+        buffer.rainbow(int(256 * elapsed / cycleTime))
+        buffer.flush(strip)
@@ -0,0 +1,226 @@
+# weather_word/hedge.py
+#
+# Hedged fetching. The request goes to the primary endpoint (the configured provider) first; when it has not answered
+# within the hedge delay - the HEDGE_PERCENTILE latency of its recent answers - or when it fails, the same forecast is
+# requested from the next secondary endpoint (another provider, or a mirror of the api) on a small thread pool. The
+# first valid answer is taken and the other requests are cancelled, so one slow upstream answer no longer sets the
+# latency of the whole cycle while only the slowest few percent of requests are sent twice. An answer of another
+# provider is parsed by that provider, and only answers of the primary or of a mirror of its api are cached.
+#
+# Secondary endpoints are set with HEDGE_ENDPOINTS (or the WEATHER_WORD_HEDGE environment variable) as whitespace
+# separated provider[=base url][@query] entries, for example
+#   wunderground=http://mirror.example.com/api/     the same api at a mirror
+#   open-meteo@25.77,-80.19                        another provider, with the query it needs
+
+import os
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from .config import HEDGE_ENDPOINTS, HEDGE_INITIAL_DELAY, HEDGE_MIN_DELAY, HEDGE_PERCENTILE, HEDGE_HISTORY, HEDGE_MIN_SAMPLES
+from .fetch import FetchError, FetchTimeout
+from .httpclient import HttpClient, Deadline
+from .providers import createProvider
+from .metrics import HEDGED_REQUESTS, FETCH_WINS
+
+logger = logging.getLogger(__name__)
+
+class Endpoint(object):
+    # a provider at a base url (None for its default) with its own connections - query replaces the query read from
+    # apiboot.txt for providers that need another one
+
+    def __init__(self, provider, baseUrl=None, query=None, client=None):
+        self.provider = provider
+        self.baseUrl = baseUrl
+        self.query = query
+        self.client = client or HttpClient()
+        self.name = provider.name + ('=' + baseUrl if baseUrl else '') + ('@' + query if query else '')
+        self.lock = threading.Lock()
+        self.lastObj = None             # last response received from this endpoint
+        self.requests = 0
+        self.wins = 0
+
+    def url(self, apiVal):
+        if self.query is not None:
+            apiVal = [apiVal[0], self.query, apiVal[2]]
+        return self.provider.url(apiVal, self.baseUrl)
+
+    def mirrors(self, primary):
+        # True when the endpoint sends the same response as primary - primary itself or a mirror of its api asked for
+        # the same query - so that its answers can be kept in place of those of primary
+        return self is primary or (self.provider.name == primary.provider.name and self.query is None)
+
+def parseEndpoints(spec, fields):
+    # secondary endpoints from provider[=base url][@query] entries separated by whitespace
+    endpoints = []
+    for entry in spec.split():
+        name, query = entry.split('@', 1) if '@' in entry else (entry, None)
+        name, baseUrl = name.split('=', 1) if '=' in name else (name, None)
+        endpoints.append(Endpoint(createProvider(name, fields), baseUrl or None, query))
+    return endpoints
+
+class Attempt(object):
+    # one request of a hedged fetch
+
+    def __init__(self, endpoint, deadline):
+        self.endpoint = endpoint
+        self.deadline = deadline
+        self.future = None
+        self.latency = None
+
+    def cancel(self):
+        # stop the request at its next deadline check, waking it up if it is blocked on its socket
+        self.future.cancel()
+        self.deadline.cancel()
+        self.endpoint.client.abort()
+
+class HedgedFetcher(object):
+    # races a primary endpoint against secondary endpoints started one by one after the hedge delay
+
+    # pool is a thread pool shared with other hedged fetchers that fetch in turn (see createHedgePool), by default the
+    # fetcher has its own
+
+    def __init__(self, primary, secondaries, initialDelay=HEDGE_INITIAL_DELAY, minDelay=HEDGE_MIN_DELAY,
+                 percentile=HEDGE_PERCENTILE, history=HEDGE_HISTORY, minSamples=HEDGE_MIN_SAMPLES, pool=None):
+        self.primary = primary
+        self.endpoints = [primary] + list(secondaries)
+        self.initialDelay = initialDelay
+        self.minDelay = minDelay
+        self.percentile = percentile
+        self.minSamples = minSamples
+        self.latencies = deque(maxlen=history)     # seconds the primary took for its recent answers
+        self.ownsPool = pool is None
+        self.pool = pool or ThreadPoolExecutor(max_workers=len(self.endpoints), thread_name_prefix='hedge')
+        self.fetches = 0
+        self.hedges = 0
+        self.lastEndpoint = None        # endpoint that gave the last answer taken
+
+    def hedgeDelay(self):
+        # seconds to wait for the primary before the next endpoint is asked
+        if len(self.latencies) < self.minSamples:
+            return self.initialDelay
+        ordered = sorted(self.latencies)
+        return max(self.minDelay, ordered[min(len(ordered) - 1, int(len(ordered) * self.percentile))])
+
+    def runAttempt(self, attempt, apiVal):
+        endpoint = attempt.endpoint
+        with endpoint.lock:
+            endpoint.requests += 1
+            try:
+                return endpoint.provider.fetch(endpoint.url(apiVal), endpoint.client, attempt.deadline)
+            finally:
+                attempt.latency = attempt.deadline.elapsed()
+
+    def fetch(self, apiVal, deadline, current=None):
+        # fetch the forecast from the first endpoint to give a valid answer within the deadline - returns the endpoint
+        # and its response, which is None when the answer is that current, the response the primary was last
+        # revalidated against, is still current - the response is in the format of the provider of the endpoint
+        self.fetches += 1
+        attempts = []
+        unhandled = []                  # attempts whose answer has not been looked at yet, in the order they started
+        errors = []
+        pending = list(self.endpoints)
+
+        def launch():
+            attempt = Attempt(pending.pop(0), Deadline(max(0.0, deadline.remaining())))
+            attempt.future = self.pool.submit(self.runAttempt, attempt, apiVal)
+            attempts.append(attempt)
+            unhandled.append(attempt)
+            if len(attempts) > 1:
+                self.hedges += 1
+                HEDGED_REQUESTS.inc()
+            return deadline.elapsed() + self.hedgeDelay()
+
+        hedgeAt = launch()
+        try:
+            while True:
+                if pending:
+                    timeout = min(hedgeAt, deadline.elapsed() + deadline.remaining()) - deadline.elapsed()
+                else:
+                    timeout = deadline.remaining()
+                if unhandled and timeout > 0:
+                    # returns at once when an attempt finished since it was last looked at
+                    wait([attempt.future for attempt in unhandled], timeout, return_when=FIRST_COMPLETED)
+                for attempt in list(unhandled):
+                    if not attempt.future.done():
+                        continue
+                    unhandled.remove(attempt)
+                    try:
+                        return attempt.endpoint, self.accept(attempt, attempt.future.result(), deadline, current)
+                    except FetchError as e:
+                        errors.append((self.endpoints.index(attempt.endpoint), e))
+                        logger.warning('Request to ' + attempt.endpoint.name + ' failed: ' + str(e) + '.')
+                        if pending:
+                            # ask the next endpoint at once rather than waiting out the hedge delay
+                            hedgeAt = deadline.elapsed()
+                if deadline.remaining() <= 0:
+                    stage = attempts[0].deadline.stage or 'read'
+                    raise FetchTimeout(stage)
+                if pending and deadline.elapsed() >= hedgeAt:
+                    hedgeAt = launch()
+                elif not pending and not unhandled:
+                    # every endpoint failed - report the failure of the endpoint tried first
+                    raise min(errors, key=lambda error: error[0])[1]
+        finally:
+            cancelled = [attempt for attempt in attempts if not attempt.future.done()]
+            for attempt in cancelled:
+                attempt.cancel()
+            if not self.ownsPool:
+                # the client of the primary is used by the next fetcher of a shared pool as soon as this one returns -
+                # a cancelled request gives up at once or at the latest at the end of its deadline
+                wait([attempt.future for attempt in cancelled])
+
+    def accept(self, attempt, obj, deadline, current):
+        # take the answer of an attempt - raises FetchError for a 304 there is no response to keep for
+        endpoint = attempt.endpoint
+        if endpoint is self.primary:
+            self.latencies.append(attempt.latency)
+        if obj is None:
+            # the endpoint holds validators for the response it sent last (the primary for current until it sent one)
+            kept = endpoint.lastObj if endpoint.lastObj is not None or endpoint is not self.primary else current
+            if kept is None:
+                raise FetchError('Not modified, but no earlier response from ' + endpoint.name)
+            obj = None if kept is current else kept
+        else:
+            endpoint.lastObj = obj
+        endpoint.wins += 1
+        self.lastEndpoint = endpoint
+        FETCH_WINS.inc(endpoint=endpoint.name)
+        deadline.timings.update(attempt.deadline.timings)
+        if endpoint is not self.primary:
+            logger.info('Answer taken from ' + endpoint.name + '.')
+        return obj
+
+    def stats(self):
+        return {'fetches': self.fetches, 'hedges': self.hedges, 'delay': round(self.hedgeDelay(), 3),
+                'endpoints': dict((endpoint.name, {'requests': endpoint.requests, 'wins': endpoint.wins})
+                                  for endpoint in self.endpoints)}
+
+    def close(self):
+        if self.ownsPool:
+            self.pool.shutdown(wait=False)
+        for endpoint in self.endpoints[1:]:
+            endpoint.client.close()
+
+def hedgeSpec(spec=None):
+    # the configured secondary endpoints (WEATHER_WORD_HEDGE environment variable or HEDGE_ENDPOINTS)
+    if spec is None:
+        spec = os.environ.get('WEATHER_WORD_HEDGE', HEDGE_ENDPOINTS)
+    return spec
+
+def createHedger(provider, client, spec=None, pool=None):
+    # hedged fetcher racing provider (using client) against the configured secondary endpoints - None when there are
+    # none
+    secondaries = parseEndpoints(hedgeSpec(spec), provider.fields)
+    if not secondaries:
+        return None
+    return HedgedFetcher(Endpoint(provider, client=client), secondaries, pool=pool)
+
+def createHedgePool(spec=None):
+    # thread pool for the hedged fetchers of workers that fetch in turn on one thread - None when no secondary
+    # endpoints are configured
+    count = len(hedgeSpec(spec).split())
+    if not count:
+        return None
+    return ThreadPoolExecutor(max_workers=count + 1, thread_name_prefix='hedge')
@@ -0,0 +1,372 @@
+# weather_word/httpclient.py
+#
+# Small HTTP client for the weather api. It keeps one connection per host open between requests, asks for gzip or
+# deflate compressed responses and decodes them, and holds the ETag and Last-Modified validators its caller kept for
+# each url (once it has checked the response) so the next request for it can be answered with 304 Not Modified instead
+# of the full response.
+#
+# Every request runs against a Deadline: an overall time budget (FETCH_DEADLINE) split into connect (DNS lookup, TCP
+# and TLS handshakes), read (request and response) and decode stages, each with its own timeout. A stage that runs out
+# of time raises DeadlineExceeded, so a stalled connection can never hold the fetch worker for longer than the budget.
+#
+# The body of a response can also be streamed: it is decompressed chunk by chunk as it arrives and handed to a sink
+# (see extract.py), which can stop the reading once it has what it needs. Streamed responses are read and parsed within
+# the read stage.
+
+import ssl
+import time
+import zlib
+import socket
+import threading
+import http.client
+from urllib.parse import urlsplit
+
+from .config import FETCH_DEADLINE, CONNECT_TIMEOUT, READ_TIMEOUT, DECODE_TIMEOUT
+
+USER_AGENT = 'weather_word'
+READ_CHUNK_SIZE = 16384             # bytes read from the socket (or decompressed) between deadline checks
+DRAIN_LIMIT = 65536                 # largest rest of a streamed body read anyway to keep the connection open
+
+class DeadlineExceeded(Exception):
+    # a stage of a request ran out of time - stage is 'connect', 'read' or 'decode'
+
+    def __init__(self, stage):
+        Exception.__init__(self, 'Timed out in the ' + stage + ' stage of the request')
+        self.stage = stage
+
+class Deadline(object):
+    # overall time budget of a request, handed out to its stages
+
+    def __init__(self, budget=FETCH_DEADLINE, clock=time.monotonic):
+        self.clock = clock
+        self.startTime = clock()
+        self.expiresAt = self.startTime + budget
+        self.stage = None
+        self.stageStart = None
+        self.stageEnd = None
+        self.timings = {}               # seconds spent in each finished stage
+
+    def remaining(self):
+        return self.expiresAt - self.clock()
+
+    def startStage(self, stage, limit):
+        # end the current stage and give the next one limit seconds, or what is left of the budget if less
+        self.endStage()
+        now = self.clock()
+        self.stage = stage
+        self.stageStart = now
+        self.stageEnd = min(now + limit, self.expiresAt)
+
+    def endStage(self):
+        if self.stage is not None:
+            self.timings[self.stage] = self.timings.get(self.stage, 0.0) + self.clock() - self.stageStart
+            self.stage = None
+
+    def timeout(self):
+        # seconds left in the current stage - raises DeadlineExceeded once there are none
+        left = self.stageEnd - self.clock()
+        if left <= 0:
+            raise DeadlineExceeded(self.stage)
+        return left
+
+    def elapsed(self):
+        return self.clock() - self.startTime
+
+    def cancel(self):
+        # use up the budget, so the request stops at its next check of the deadline
+        self.expiresAt = self.clock()
+        if self.stageEnd is not None:
+            self.stageEnd = self.expiresAt
+
+class HttpResponse(object):
+    # status, headers and decoded body of a response
+    __slots__ = ('status', 'headers', 'body', 'wireBytes')
+
+    def __init__(self, status, headers, body, wireBytes):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.wireBytes = wireBytes      # size of the body as received, before decompression
+
+    def notModified(self):
+        return self.status == 304
+
+    def validators(self):
+        # ETag and Last-Modified of the response
+        return self.headers.get('etag'), self.headers.get('last-modified')
+
+class BodyDecoder(object):
+    # incremental decompression of a body sent with Content-Encoding gzip or deflate (other bodies pass through)
+
+    def __init__(self, encoding):
+        encoding = (encoding or '').strip().lower()
+        self.deflate = encoding == 'deflate'
+        if encoding in ('gzip', 'x-gzip'):
+            self.decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif self.deflate:
+            self.decompressor = zlib.decompressobj(zlib.MAX_WBITS)
+        else:
+            self.decompressor = None
+        self.started = False
+
+    def decode(self, data, limit=0):
+        # decompress data - with a limit, at most limit bytes are returned and the rest of data is kept back
+        if self.decompressor is None:
+            return data
+        if self.deflate and not self.started:
+            # servers send deflate either zlib wrapped (as the standard says) or raw - the first chunk tells which
+            self.started = True
+            try:
+                return self.decompressor.decompress(data, limit)
+            except zlib.error:
+                self.decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+        return self.decompressor.decompress(data, limit)
+
+    def pieces(self, data):
+        # decompress data in pieces of at most READ_CHUNK_SIZE bytes, so that a small compressed chunk is never
+        # inflated all at once when only its start is needed
+        if self.decompressor is None:
+            yield data
+            return
+        piece = self.decode(data, READ_CHUNK_SIZE)
+        while True:
+            yield piece
+            tail = self.decompressor.unconsumed_tail
+            if not tail:
+                return
+            piece = self.decompressor.decompress(tail, READ_CHUNK_SIZE)
+
+    def flush(self):
+        return self.decompressor.flush() if self.decompressor is not None else b''
+
+def decodeBody(body, encoding, deadline=None):
+    # decompress a whole body sent with Content-Encoding gzip or deflate, checking the deadline between chunks
+    decoder = BodyDecoder(encoding)
+    if decoder.decompressor is None:
+        return body
+    chunks = []
+    for start in range(0, len(body), READ_CHUNK_SIZE):
+        if deadline is not None:
+            deadline.timeout()
+        chunks.append(decoder.decode(body[start:start + READ_CHUNK_SIZE]))
+    chunks.append(decoder.flush())
+    return b''.join(chunks)
+
+def resolve(host, port, timeout):
+    # look up the addresses of host on a helper thread, since getaddrinfo() has no timeout of its own - a lookup that
+    # times out is left to finish in the background
+    result = []
+
+    def lookup():
+        try:
+            result.append(socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM))
+        except OSError as e:
+            result.append(e)
+
+    thread = threading.Thread(target=lookup, name='dns-lookup')
+    thread.daemon = True
+    thread.start()
+    thread.join(timeout)
+    if not result:
+        raise socket.timeout('dns lookup timed out')
+    if isinstance(result[0], Exception):
+        raise result[0]
+    return result[0]
+
+class HttpClient(object):
+    # keep-alive connections with compression and conditional requests
+
+    def __init__(self):
+        self.sslContext = ssl.create_default_context()
+        self.connections = {}          # (scheme, host, port) -> open connection
+        self.validators = {}           # url -> (etag, lastModified) of the last response kept for the url
+        self.requests = 0
+        self.connectionsOpened = 0
+        self.wireBytes = 0
+        self.timeouts = 0
+
+    def connection(self, scheme, host, port, deadline):
+        # the kept-alive connection to host, or a new one connected within the connect stage of the deadline -
+        # returns the connection, its key and whether it was reused
+        key = (scheme, host, port)
+        conn = self.connections.get(key)
+        if conn is not None and conn.sock is not None:
+            return conn, key, True
+        deadline.startStage('connect', CONNECT_TIMEOUT)
+        if scheme == 'https':
+            conn = http.client.HTTPSConnection(host, port, context=self.sslContext)
+        else:
+            conn = http.client.HTTPConnection(host, port)
+        error = OSError('no address found for ' + host)
+        for family, socketType, proto, canonName, address in resolve(host, port, deadline.timeout()):
+            sock = socket.socket(family, socketType, proto)
+            try:
+                sock.settimeout(deadline.timeout())
+                sock.connect(address)
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                if scheme == 'https':
+                    sock.settimeout(deadline.timeout())
+                    sock = self.sslContext.wrap_socket(sock, server_hostname=host)
+            except socket.timeout:
+                sock.close()
+                raise
+            except OSError as e:
+                # try the next address of the host
+                sock.close()
+                error = e
+                continue
+            except BaseException:
+                # DeadlineExceeded from deadline.timeout() - the socket is not handed to the connection
+                sock.close()
+                raise
+            conn.sock = sock
+            self.connections[key] = conn
+            self.connectionsOpened += 1
+            return conn, key, False
+        raise error
+
+    def dropConnection(self, key):
+        conn = self.connections.pop(key, None)
+        if conn is not None:
+            conn.close()
+
+    def setValidators(self, url, etag, lastModified):
+        # remember the validators of a kept response (a checked one, or one from the forecast cache) - None for both
+        # forgets them
+        if etag or lastModified:
+            self.validators[url] = (etag, lastModified)
+        else:
+            self.validators.pop(url, None)
+
+    def getValidators(self, url):
+        return self.validators.get(url, (None, None))
+
+    def get(self, url, conditional=True, deadline=None, sink=None):
+        # GET url within the deadline - a 304 response (when conditional and the url was fetched before) has an empty
+        # body. The deadline is left in its decode stage so the caller can go on to parse the body within it.
+        # With a sink, the decompressed body of a 200 response is fed to sink(data) as it arrives instead of being
+        # returned, until sink returns True to say it needs no more.
+        if deadline is None:
+            deadline = Deadline()
+        parts = urlsplit(url)
+        scheme = parts.scheme or 'http'
+        port = parts.port or (443 if scheme == 'https' else 80)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        headers = {'Host': parts.netloc, 'Accept-Encoding': 'gzip, deflate', 'User-Agent': USER_AGENT}
+        if conditional and url in self.validators:
+            etag, lastModified = self.validators[url]
+            if etag:
+                headers['If-None-Match'] = etag
+            if lastModified:
+                headers['If-Modified-Since'] = lastModified
+
+        key = (scheme, parts.hostname, port)
+        try:
+            # a kept-alive connection may have been closed by the server since the last request - retry once on a
+            # new one
+            for attempt in range(2):
+                conn, key, reused = self.connection(scheme, parts.hostname, port, deadline)
+                deadline.startStage('read', READ_TIMEOUT)
+                # the connection lets go of its socket when the response closes it, so keep hold of it for reading
+                sock = conn.sock
+                try:
+                    sock.settimeout(deadline.timeout())
+                    conn.request('GET', path, headers=headers)
+                    response = conn.getresponse()
+                    if sink is not None and response.status == 200:
+                        body = None
+                        wireBytes, complete = self.streamBody(sock, response, deadline, sink)
+                    else:
+                        body = self.readBody(sock, response, deadline)
+                        wireBytes, complete = len(body), True
+                except (socket.timeout, DeadlineExceeded):
+                    raise
+                except (http.client.HTTPException, OSError):
+                    self.dropConnection(key)
+                    if reused and attempt == 0:
+                        continue
+                    raise
+                except Exception:
+                    # the sink could not take the body
+                    self.dropConnection(key)
+                    raise
+                break
+        except (socket.timeout, DeadlineExceeded):
+            # the connection is in an unknown state after a timeout - never reuse it
+            self.dropConnection(key)
+            self.timeouts += 1
+            stage = deadline.stage or 'connect'
+            deadline.endStage()
+            raise DeadlineExceeded(stage)
+        if response.will_close or not complete:
+            self.dropConnection(key)
+
+        self.requests += 1
+        self.wireBytes += wireBytes
+        responseHeaders = dict((name.lower(), value) for name, value in response.getheaders())
+        deadline.startStage('decode', DECODE_TIMEOUT)
+        if body is not None:
+            try:
+                body = decodeBody(body, responseHeaders.get('content-encoding'), deadline)
+            except DeadlineExceeded:
+                self.timeouts += 1
+                deadline.endStage()
+                raise
+        return HttpResponse(response.status, responseHeaders, body, wireBytes)
+
+    def readBody(self, sock, response, deadline):
+        # read the response body in chunks, giving each socket read only what is left of the read stage
+        chunks = []
+        while True:
+            sock.settimeout(deadline.timeout())
+            chunk = response.read1(READ_CHUNK_SIZE)
+            if not chunk:
+                # read() marks the response as complete so the connection can take the next request
+                chunks.append(response.read())
+                return b''.join(chunks)
+            chunks.append(chunk)
+
+    def streamBody(self, sock, response, deadline, sink):
+        # decompress the response body as it arrives and feed it to the sink - once the sink needs no more, a short
+        # rest of the body is still read (and thrown away) so the connection stays usable, a longer one is left unread
+        # returns the bytes read from the socket and whether the whole body was read
+        decoder = BodyDecoder(response.getheader('content-encoding'))
+        wireBytes = 0
+        done = False
+        while True:
+            if done and (response.length is None or response.length > DRAIN_LIMIT):
+                return wireBytes, False
+            sock.settimeout(deadline.timeout())
+            chunk = response.read1(READ_CHUNK_SIZE)
+            if not chunk:
+                response.read()
+                if not done:
+                    sink(decoder.flush())
+                return wireBytes, True
+            wireBytes += len(chunk)
+            if not done:
+                for piece in decoder.pieces(chunk):
+                    if sink(piece):
+                        done = True
+                        break
+
+    def stats(self):
+        return {'requests': self.requests, 'connections': self.connectionsOpened, 'wire_bytes': self.wireBytes,
+                'timeouts': self.timeouts}
+
+    def abort(self):
+        # wake up a request blocked on a socket read from another thread - the request fails with a closed connection
+        # (use together with Deadline.cancel(), so it is not retried)
+        for conn in list(self.connections.values()):
+            sock = conn.sock
+            if sock is not None:
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+    def close(self):
+        for key in list(self.connections):
+            self.dropConnection(key)
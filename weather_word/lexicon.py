@@ -0,0 +1,175 @@
+# weather_word/lexicon.py
+#
+# Wiring of the words in the 22 x 13 LED matrix and the phrases built from them, compiled into frames at import.
+
+from .config import LED_COUNT
+from .frame import Frame, EMPTY_FRAME
+
+# word lexicon - maps each word in the 22 x 13 matrix to the [start, stop) range of its pixel indices
+# words that appear more than once in the matrix are tagged with the number they are used for
+WORD_PIXELS = {
+    'currently':     (0, 9),
+    'one#100':       (10, 13),
+    'low':           (14, 17),
+    'upcoming':      (18, 26),
+    'high':          (26, 30),
+    'minus':         (30, 35),
+    'zero':          (35, 39),
+    'twenty':        (39, 45),
+    'hundred':       (45, 52),
+    'twelve':        (52, 58),
+    'eleven':        (59, 65),
+    'ty#80':         (65, 67),
+    'eigh':          (67, 71),
+    'ty#70':         (71, 73),
+    'seven#10':      (73, 78),
+    'nine#10':       (78, 82),
+    'ty#90':         (82, 84),
+    'thir':          (85, 89),
+    'ty#30':         (89, 91),
+    'one':           (91, 94),
+    'ty#50':         (94, 96),
+    'fif':           (96, 99),
+    'forty':         (99, 104),
+    'six#10':        (104, 107),
+    'ty#60':         (107, 109),
+    'four':          (109, 113),
+    'teen':          (113, 117),
+    'five':          (117, 121),
+    'three':         (121, 126),
+    'nine':          (126, 130),
+    'six':           (130, 133),
+    'seven':         (133, 138),
+    'eight':         (138, 143),
+    'degrees':       (143, 150),
+    'ten':           (150, 153),
+    'two':           (153, 156),
+    'breezy':        (156, 162),
+    'windy':         (162, 167),
+    '&':             (168, 169),
+    'very':          (169, 173),
+    'hazy':          (173, 177),
+    'clear':         (177, 182),
+    'mostly':        (182, 188),
+    'partly':        (188, 194),
+    'hot':           (195, 198),
+    'cloudy':        (198, 204),
+    'cold':          (204, 208),
+    'flurries':      (208, 216),
+    'foggy':         (216, 221),
+    'rain':          (222, 226),
+    'blowing':       (227, 234),
+    'snow':          (234, 238),
+    'showers':       (240, 247),
+    'thunderstorms': (247, 260),
+    'ice':           (260, 263),
+    'blizzard':      (265, 273),
+    'likely':        (273, 279),
+    'pellets':       (279, 286),
+}
+
+# phrases - the words lit together for each header, number digit, wind band and coded weather condition
+HEADER_PHRASES = {
+    'current': ('currently',),
+    'low':     ('upcoming', 'low'),
+    'high':    ('upcoming', 'high'),
+}
+DEGREES_PHRASE = ('degrees', '&')
+HUNDREDS_PHRASE = ('one#100', 'hundred')
+TEENS_PHRASES = {
+    '11': ('eleven',),
+    '12': ('twelve',),
+    '13': ('thir', 'teen'),
+    '14': ('four', 'teen'),
+    '15': ('fif', 'teen'),
+    '16': ('six#10', 'teen'),
+    '17': ('seven#10', 'teen'),
+    '18': ('eigh', 'teen'),
+    '19': ('nine#10', 'teen'),
+}
+TENS_PHRASES = {
+    '1': ('ten',),
+    '2': ('twenty',),
+    '3': ('thir', 'ty#30'),
+    '4': ('forty',),
+    '5': ('fif', 'ty#50'),
+    '6': ('six#10', 'ty#60'),
+    '7': ('seven#10', 'ty#70'),
+    '8': ('eigh', 'ty#80'),
+    '9': ('nine#10', 'ty#90'),
+}
+ONES_PHRASES = {
+    '1': ('one',),
+    '2': ('two',),
+    '3': ('three',),
+    '4': ('four',),
+    '5': ('five',),
+    '6': ('six',),
+    '7': ('seven',),
+    '8': ('eight',),
+    '9': ('nine',),
+}
+WIND_PHRASES = {
+    'breezy': ('breezy',),
+    'windy':  ('windy',),
+}
+FORECAST_PHRASES = {
+    '1':  ('clear',),
+    '2':  ('partly', 'cloudy'),
+    '3':  ('mostly', 'cloudy'),
+    '4':  ('cloudy',),
+    '5':  ('hazy',),
+    '6':  ('foggy',),
+    '7':  ('very', 'hot'),
+    '8':  ('very', 'cold'),
+    '9':  ('blowing', 'snow'),
+    '10': ('showers', 'likely'),
+    '11': ('showers',),
+    '12': ('rain', 'likely'),
+    '13': ('rain',),
+    '14': ('thunderstorms', 'likely'),
+    '15': ('thunderstorms',),
+    '16': ('flurries',),
+    '18': ('snow', 'showers', 'likely'),
+    '19': ('snow', 'showers'),
+    '20': ('snow', 'likely'),
+    '21': ('snow',),
+    '22': ('ice', 'pellets', 'likely'),
+    '23': ('ice', 'pellets'),
+    '24': ('blizzard',),
+}
+
+def compileLexicon(wordPixels):
+    # check the word wiring against the matrix and compile each word into a frame of its pixels
+    frames = {}
+    used = EMPTY_FRAME
+    for word, (start, stop) in wordPixels.items():
+        if not 0 <= start < stop <= LED_COUNT:
+            raise ValueError('word "' + word + '" has pixels outside of the matrix: ' + str((start, stop)))
+        frame = Frame(((1 << (stop - start)) - 1) << start)
+        if frame & used:
+            raise ValueError('word "' + word + '" overlaps the pixels of another word')
+        used |= frame
+        frames[word] = frame
+    return frames
+
+def compilePhrase(words):
+    # merge the precomputed frames of a sequence of words into a single frame
+    frame = EMPTY_FRAME
+    for word in words:
+        frame |= WORD_FRAMES[word]
+    return frame
+
+def compilePhrases(phrases):
+    # compile a table of phrases into a table of frames
+    return {key: compilePhrase(words) for key, words in phrases.items()}
+
+WORD_FRAMES = compileLexicon(WORD_PIXELS)
+HEADER_FRAMES = compilePhrases(HEADER_PHRASES)
+DEGREES_FRAME = compilePhrase(DEGREES_PHRASE)
+HUNDREDS_FRAME = compilePhrase(HUNDREDS_PHRASE)
+TEENS_FRAMES = compilePhrases(TEENS_PHRASES)
+TENS_FRAMES = compilePhrases(TENS_PHRASES)
+ONES_FRAMES = compilePhrases(ONES_PHRASES)
+WIND_FRAMES = compilePhrases(WIND_PHRASES)
+FORECAST_FRAMES = compilePhrases(FORECAST_PHRASES)
@@ -0,0 +1,70 @@
+# weather_word/log.py
+#
+# Logging for general troubleshooting and data review. The modules log through the standard logging package under the
+# 'weather_word' logger; setupLogging() sends the records to log.txt as one compact JSON object per line. Records are
+# held in memory and written in one go when the fetch worker calls flushLog() at the end of each cycle (or at once for
+# errors), and log.txt is rotated by size, so the SD card sees a single small write every cycle. The response payload
+# and the frame pixels are only logged at the DEBUG level.
+
+import os
+import json
+import time
+import logging
+import logging.handlers
+
+from .config import PATH_NAME, LOG_FILE, LOG_LEVEL, LOG_MAX_BYTES, LOG_BACKUPS, LOG_BUFFER_CAPACITY
+
+LOGGER_NAME = 'weather_word'
+
+# the package logs nothing until setupLogging() is called (for example when used from the bench)
+logging.getLogger(LOGGER_NAME).addHandler(logging.NullHandler())
+
+class JsonLineFormatter(logging.Formatter):
+    # formats a record as one line of JSON - structured values passed with extra={'data': ...} are kept as fields
+
+    def format(self, record):
+        entry = {'time': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(record.created)),
+                 'level': record.levelname,
+                 'logger': record.name,
+                 'thread': record.threadName,
+                 'message': record.getMessage()}
+        data = getattr(record, 'data', None)
+        if data is not None:
+            entry['data'] = data
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, separators=(',', ':'), default=str)
+
+def setupLogging(path=None, level=None, maxBytes=LOG_MAX_BYTES, backups=LOG_BACKUPS, capacity=LOG_BUFFER_CAPACITY):
+    # send the records of the package to a size-rotated JSON-lines file through an in-memory buffer
+    # the level can be set with the WEATHER_WORD_LOG_LEVEL environment variable (or LOG_LEVEL)
+    if path is None:
+        path = PATH_NAME + LOG_FILE
+    if level is None:
+        level = os.environ.get('WEATHER_WORD_LOG_LEVEL', LOG_LEVEL)
+    fileHandler = logging.handlers.RotatingFileHandler(path, maxBytes=maxBytes, backupCount=backups, delay=True)
+    fileHandler.setFormatter(JsonLineFormatter())
+    bufferHandler = logging.handlers.MemoryHandler(capacity, flushLevel=logging.ERROR, target=fileHandler)
+    logger = logging.getLogger(LOGGER_NAME)
+    for handler in list(logger.handlers):
+        if isinstance(handler, logging.handlers.MemoryHandler):
+            logger.removeHandler(handler)
+            handler.close()
+    logger.addHandler(bufferHandler)
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+    logger.propagate = False
+    return logger
+
+def rotateFile(path, backups):
+    # move path to path.1, path.1 to path.2 and so on, keeping backups old files - as the log is rotated, for the other
+    # files written under PATH_NAME
+    for i in range(backups - 1, 0, -1):
+        if os.path.exists(path + '.' + str(i)):
+            os.replace(path + '.' + str(i), path + '.' + str(i + 1))
+    if backups > 0 and os.path.exists(path):
+        os.replace(path, path + '.1')
+
+def flushLog():
+    # write the buffered records to the log file
+    for handler in logging.getLogger(LOGGER_NAME).handlers:
+        handler.flush()
@@ -0,0 +1,284 @@
+# weather_word/metrics.py
+#
+# Lightweight instrumentation. Counters, gauges and histograms live in a Registry and are rendered in the Prometheus text
+# format, either to a file (METRICS_FILE, rewritten by the fetch worker once per cycle - ready for the node_exporter
+# textfile collector, and best kept on a tmpfs to spare the SD card) or on a small HTTP /metrics endpoint (METRICS_PORT).
+# Both are off by default. Stage timers use the monotonic clock. Values kept elsewhere (such as the strip and HTTP
+# statistics) are read by collector functions when the metrics are rendered, so they cost nothing in between. The HTTP
+# server and logging are only imported when the endpoint is started, so timing a frame needs nothing but this module.
+
+import os
+import time
+import threading
+
+from .config import PATH_NAME, METRICS_FILE, METRICS_HOST, METRICS_PORT
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+FPS_BUCKETS = (5, 10, 15, 20, 25, 28, 30, 45, 60)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+def formatLabels(labelNames, labelValues, extra=()):
+    pairs = list(zip(labelNames, labelValues)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(name + '="' + str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+                          for name, value in pairs) + '}'
+
+def formatValue(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+class Counter(object):
+    # a total that only goes up, one per combination of label values
+    kind = 'counter'
+
+    def __init__(self, name, help, labelNames=()):
+        self.name = name
+        self.help = help
+        self.labelNames = tuple(labelNames)
+        self.lock = threading.Lock()
+        self.values = {}
+        if not self.labelNames:
+            # a metric without labels is exported as zero until it is first updated
+            self.values[()] = self.initialValue()
+
+    def initialValue(self):
+        return 0
+
+    def key(self, labels):
+        if set(labels) != set(self.labelNames):
+            raise ValueError(self.name + ' takes the labels ' + str(self.labelNames))
+        return tuple(str(labels[name]) for name in self.labelNames)
+
+    def inc(self, amount=1, **labels):
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def set(self, value, **labels):
+        # set the value from a total kept elsewhere (used by collectors)
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = value
+
+    def value(self, **labels):
+        with self.lock:
+            return self.values.get(self.key(labels), 0)
+
+    def render(self):
+        with self.lock:
+            items = sorted(self.values.items())
+        return [self.name + formatLabels(self.labelNames, key) + ' ' + formatValue(value) for key, value in items]
+
+class Gauge(Counter):
+    # a value that can go up and down
+    kind = 'gauge'
+
+class Timer(object):
+    # context manager observing the monotonic time spent in its block into a histogram
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+        self.startTime = None
+        self.elapsed = None
+
+    def __enter__(self):
+        self.startTime = time.monotonic()
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.elapsed = time.monotonic() - self.startTime
+        self.histogram.observe(self.elapsed, **self.labels)
+        return False
+
+class Histogram(Counter):
+    # counts of observed values in cumulative buckets, with their sum and count
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelNames=(), buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        Counter.__init__(self, name, help, labelNames)
+
+    def initialValue(self):
+        # count of each bucket, sum and count of the observed values
+        return [[0] * len(self.buckets), 0.0, 0]
+
+    def observe(self, value, **labels):
+        key = self.key(labels)
+        with self.lock:
+            series = self.values.get(key)
+            if series is None:
+                series = self.values[key] = self.initialValue()
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def time(self, **labels):
+        # with histogram.time(stage='parse'): ... observes the duration of the block
+        return Timer(self, labels)
+
+    def count(self, **labels):
+        with self.lock:
+            series = self.values.get(self.key(labels))
+            return series[2] if series else 0
+
+    def render(self):
+        with self.lock:
+            items = sorted((key, [list(series[0]), series[1], series[2]]) for key, series in self.values.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucketCount in zip(self.buckets, counts):
+                cumulative += bucketCount
+                lines.append(self.name + '_bucket' + formatLabels(self.labelNames, key, [('le', formatValue(float(bound)))])
+                             + ' ' + str(cumulative))
+            lines.append(self.name + '_bucket' + formatLabels(self.labelNames, key, [('le', '+Inf')]) + ' ' + str(count))
+            lines.append(self.name + '_sum' + formatLabels(self.labelNames, key) + ' ' + formatValue(total))
+            lines.append(self.name + '_count' + formatLabels(self.labelNames, key) + ' ' + str(count))
+        return lines
+
+class Registry(object):
+    # the metrics of the program and the collectors that refresh values kept elsewhere
+
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+        self.lock = threading.Lock()
+
+    def register(self, metric):
+        with self.lock:
+            self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labelNames=()):
+        return self.register(Counter(name, help, labelNames))
+
+    def gauge(self, name, help, labelNames=()):
+        return self.register(Gauge(name, help, labelNames))
+
+    def histogram(self, name, help, labelNames=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, help, labelNames, buckets))
+
+    def addCollector(self, collector):
+        # collector() is called before each rendering to update metrics from values kept elsewhere
+        with self.lock:
+            self.collectors.append(collector)
+
+    def render(self):
+        # the metrics in the Prometheus text exposition format
+        with self.lock:
+            collectors = list(self.collectors)
+            metrics = list(self.metrics)
+        for collector in collectors:
+            collector()
+        lines = []
+        for metric in metrics:
+            lines.append('# HELP ' + metric.name + ' ' + metric.help)
+            lines.append('# TYPE ' + metric.name + ' ' + metric.kind)
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def writeTextFile(self, path):
+        # write the metrics to a temporary file and move it over path, so readers never see a partial file
+        # (each thread has its own temporary file, as several fetch workers may write at once)
+        tempPath = path + '.' + str(threading.get_ident()) + '.tmp'
+        with open(tempPath, 'w') as metricsFile:
+            metricsFile.write(self.render())
+        os.replace(tempPath, path)
+
+REGISTRY = Registry()
+
+# metrics of the program
+STAGE_SECONDS = REGISTRY.histogram('weather_word_stage_seconds', 'Time spent in each stage of the fetch and display pipeline.', ('stage',))
+FETCH_ATTEMPTS = REGISTRY.counter('weather_word_fetch_attempts_total', 'Attempts to fetch weather data by result.', ('result',))
+FORECASTS_PUBLISHED = REGISTRY.counter('weather_word_forecasts_published_total', 'Forecasts parsed and handed to the display.')
+LAST_SUCCESS = REGISTRY.gauge('weather_word_last_success_timestamp_seconds', 'Unix time of the last successful fetch.', ('worker',))
+RETRY_FAILURES = REGISTRY.gauge('weather_word_retry_consecutive_failures', 'Consecutive failed attempts since the last success.', ('worker',))
+CIRCUIT_OPEN = REGISTRY.gauge('weather_word_circuit_open', '1 while the retry circuit breaker holds back requests, otherwise 0.', ('worker',))
+CIRCUIT_OPENS = REGISTRY.counter('weather_word_circuit_opens_total', 'Times the retry circuit breaker opened.')
+FPS_ACHIEVED = REGISTRY.histogram('weather_word_animation_fps', 'Frames per second achieved by each animation.', buckets=FPS_BUCKETS)
+FRAMES_SHOWN = REGISTRY.counter('weather_word_frames_shown_total', 'Animation frames shown on the strip.')
+FRAMES_DROPPED = REGISTRY.counter('weather_word_frames_dropped_total', 'Animation frames skipped because rendering ran late.')
+HTTP_REQUESTS = REGISTRY.counter('weather_word_http_requests_total', 'HTTP requests sent to the weather api.')
+HTTP_CONNECTIONS = REGISTRY.counter('weather_word_http_connections_total', 'Connections opened to the weather api.')
+HTTP_WIRE_BYTES = REGISTRY.counter('weather_word_http_wire_bytes_total', 'Response bytes received from the weather api before decompression.')
+HTTP_TIMEOUTS = REGISTRY.counter('weather_word_http_timeouts_total', 'Requests to the weather api that ran out of time.')
+HEDGED_REQUESTS = REGISTRY.counter('weather_word_hedged_requests_total', 'Requests sent to a secondary endpoint because the provider was slow or failed.')
+FETCH_WINS = REGISTRY.counter('weather_word_fetch_wins_total', 'Fetches answered by each endpoint.', ('endpoint',))
+STRIP_PIXELS = REGISTRY.counter('weather_word_strip_pixels_total', 'Pixel writes passed to the strip or skipped as unchanged.', ('display', 'result'))
+STRIP_SHOWS = REGISTRY.counter('weather_word_strip_shows_total', 'Calls of show() sent to the strip or skipped as unchanged.', ('display', 'result'))
+
+def watchStrip(strip, registry=REGISTRY, display='main'):
+    # export the pixel and show() statistics of a DiffStrip each time the metrics are rendered
+    if not hasattr(strip, 'stats'):
+        return
+    def collectStripStats():
+        stats = strip.stats()
+        STRIP_PIXELS.set(stats['pixels_written'], display=display, result='written')
+        STRIP_PIXELS.set(stats['pixels_skipped'], display=display, result='skipped')
+        STRIP_SHOWS.set(stats['shows'], display=display, result='sent')
+        STRIP_SHOWS.set(stats['shows_skipped'], display=display, result='skipped')
+    registry.addCollector(collectStripStats)
+
+def metricsFilePath():
+    # path of the metrics file (WEATHER_WORD_METRICS_FILE environment variable or METRICS_FILE) - relative paths are
+    # under PATH_NAME, None when it is disabled
+    name = os.environ.get('WEATHER_WORD_METRICS_FILE', METRICS_FILE)
+    if not name:
+        return None
+    return os.path.join(PATH_NAME, name)
+
+def writeMetricsFile(registry=REGISTRY, path=None):
+    # write the metrics to the metrics file (nothing when it is disabled)
+    if path is None:
+        path = metricsFilePath()
+        if path is None:
+            return
+    registry.writeTextFile(path)
+
+def metricsHandler(registry):
+    # request handler class serving the metrics of registry on /metrics
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render().encode('utf8')
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # scrapes are not worth a log line each
+            pass
+
+    return MetricsHandler
+
+def startMetricsServer(port=None, host=METRICS_HOST, registry=REGISTRY):
+    # serve /metrics on a daemon thread at the configured port (WEATHER_WORD_METRICS_PORT environment variable or
+    # METRICS_PORT) - returns the server, or None when the port is 0 (disabled)
+    if port is None:
+        port = int(os.environ.get('WEATHER_WORD_METRICS_PORT', METRICS_PORT))
+    if not port:
+        return None
+    from http.server import HTTPServer
+    server = HTTPServer((host, port), metricsHandler(registry))
+    thread = threading.Thread(target=server.serve_forever, name='metrics-server')
+    thread.daemon = True
+    thread.start()
+    import logging
+    logging.getLogger(__name__).info('Serving metrics on http://' + host + ':' + str(server.server_address[1]) + '/metrics.')
+    return server
@@ -0,0 +1,39 @@
+# weather_word/palette.py
+#
+# Precomputed packed colors for the display effects. The colors are packed once at import so the effects only index
+# into these tables. The strip applies LED_BRIGHTNESS itself, so the tables are kept at full level - buildWheel() and
+# scaleColor() produce brightness-adjusted colors for strips that do not.
+
+from .config import LED_COUNT
+from .strip import Color
+
+def scaleColor(color, brightness):
+    # scale each 8-bit channel of a packed color by brightness (0 to 255)
+    return (((((color >> 24) & 255) * brightness // 255) << 24) | ((((color >> 16) & 255) * brightness // 255) << 16)
+            | ((((color >> 8) & 255) * brightness // 255) << 8) | ((color & 255) * brightness // 255))
+
+def buildWheel(brightness=255):
+    # pack the 256 rainbow colors across 0-255 positions
+    wheel = []
+    for pos in range(256):
+        if pos < 85:
+            color = Color(pos * 3, 255 - pos * 3, 0)
+        elif pos < 170:
+            color = Color(255 - (pos - 85) * 3, 0, (pos - 85) * 3)
+        else:
+            color = Color(0, (pos - 170) * 3, 255 - (pos - 170) * 3)
+        wheel.append(scaleColor(color, brightness))
+    return tuple(wheel)
+
+WHEEL = buildWheel()
+
+# the wheel unrolled over 256 + LED_COUNT positions - pixel i of rainbow rotation j is RAINBOW_TRACK[i + j]
+RAINBOW_TRACK = tuple(WHEEL[i & 255] for i in range(256 + LED_COUNT))
+
+OFF = Color(0, 0, 0)
+WHITE = Color(255, 255, 255)            # weather words
+WARNING = Color(170, 170, 0)            # yellow - failed attempt to fetch weather data
+ERROR = Color(0, 170, 0)                # red (the strip is wired GRB) - program terminated
+
+# colors of unlit and lit pixels of a frame of weather words
+FRAME_COLORS = (OFF, WHITE)
@@ -0,0 +1,16 @@
+# weather_word/parse.py
+#
+# Parses the forecast data obtained from the weather api into a ForecastSeries (see series.py).
+
+from .config import OBJMAX
+from .series import ForecastSeries
+
+def parseWeatherData(obj, units, hours=OBJMAX):
+    # parse the first hours of data obtained from the weather api, converting each value to an int once
+    series = ForecastSeries()
+    forecast = obj["hourly_forecast"]
+    for i in range(hours):
+        hour = forecast[i]
+        series.append(int(hour["temp"][units]), int(hour["humidity"]), int(hour["wspd"][units]), int(hour["fctcode"]),
+                      str(hour["FCTTIME"]["civil"]))
+    return series
@@ -0,0 +1,250 @@
+# weather_word/profiling.py
+#
+# Opt-in profiling of a running unit. A profiling session is requested with the WEATHER_WORD_PROFILE environment variable
+# (number of cycles) at startup or with SIGUSR1 at any time, and starts at the next cycle of the display loop. For the
+# following PROFILE_CYCLES display cycles every cycle of the display loop and of the fetch worker runs under cProfile, a
+# sampler thread records the stacks of all threads every PROFILE_SAMPLE_INTERVAL seconds, and tracemalloc snapshots are
+# taken at the display cycle boundaries. The reports are written as text under PATH_NAME, cut to PROFILE_MAX_BYTES and
+# rotated like the log. While no session runs the cost is one attribute check per cycle.
+
+import os
+import io
+import sys
+import time
+import signal
+import pstats
+import cProfile
+import logging
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+from .config import (PATH_NAME, PROFILE_CYCLES, PROFILE_MODES, PROFILE_SAMPLE_INTERVAL, PROFILE_TRACE_FRAMES,
+                     PROFILE_MAX_BYTES, PROFILE_BACKUPS, PROFILE_TOP)
+from .log import rotateFile
+
+MODES = ('cprofile', 'sampler', 'tracemalloc')
+MAX_STACKS = 5000                   # distinct stacks kept by the sampler, further ones are counted as [other]
+STACK_DEPTH = 40                    # innermost frames kept of each sampled stack
+
+logger = logging.getLogger(__name__)
+
+# allocations made by the profilers themselves are left out of the memory report
+TRACE_FILTERS = [tracemalloc.Filter(False, module.__file__) for module in (tracemalloc, pstats, cProfile)]
+TRACE_FILTERS.append(tracemalloc.Filter(False, __file__))
+
+def writeReport(path, text, maxBytes=PROFILE_MAX_BYTES, backups=PROFILE_BACKUPS):
+    # write a report after rotating the previous ones, cut to maxBytes
+    data = text.encode('utf8')
+    if len(data) > maxBytes:
+        data = data[:maxBytes].rsplit(b'\n', 1)[0] + b'\n[cut at ' + str(maxBytes).encode('ascii') + b' bytes]\n'
+    rotateFile(path, backups)
+    with open(path, 'wb') as reportFile:
+        reportFile.write(data)
+
+def frameLabel(frame):
+    code = frame.f_code
+    return code.co_name + ' (' + os.path.basename(code.co_filename) + ':' + str(frame.f_lineno) + ')'
+
+class StackSampler(threading.Thread):
+    # records the stack of every other thread every interval seconds, counted in the collapsed format of flame graphs
+
+    def __init__(self, interval=PROFILE_SAMPLE_INTERVAL):
+        threading.Thread.__init__(self, name='profile-sampler')
+        self.daemon = True
+        self.interval = interval
+        self.stopping = threading.Event()
+        self.stacks = Counter()
+        self.samples = 0
+
+    def stop(self):
+        self.stopping.set()
+        self.join()
+
+    def run(self):
+        ownId = threading.get_ident()
+        while not self.stopping.wait(self.interval):
+            names = dict((thread.ident, thread.name) for thread in threading.enumerate())
+            for ident, frame in sys._current_frames().items():
+                if ident == ownId:
+                    continue
+                labels = []
+                while frame is not None and len(labels) < STACK_DEPTH:
+                    labels.append(frameLabel(frame))
+                    frame = frame.f_back
+                labels.append(names.get(ident, str(ident)))
+                stack = ';'.join(reversed(labels))
+                if stack not in self.stacks and len(self.stacks) >= MAX_STACKS:
+                    stack = '[other]'
+                self.stacks[stack] += 1
+            self.samples += 1
+
+    def report(self):
+        lines = ['# ' + str(self.samples) + ' samples every ' + str(self.interval) + ' s of all threads, as collapsed '
+                 'stacks (thread;outermost;...;innermost count) for flamegraph.pl']
+        lines.extend(stack + ' ' + str(count) for stack, count in self.stacks.most_common())
+        return '\n'.join(lines) + '\n'
+
+class ProfileSession(object):
+    # the profilers of one session and the reports they produce
+
+    def __init__(self, cycles, modes):
+        self.cycles = cycles
+        self.modes = modes
+        self.cyclesDone = 0
+        self.startTime = time.time()
+        self.lock = threading.Lock()
+        self.stats = None
+        self.profiledCycles = 0
+        self.sampler = None
+        self.startedTracing = False
+        self.firstSnapshot = None
+        self.lastSnapshot = None
+        if 'sampler' in modes:
+            self.sampler = StackSampler()
+            self.sampler.start()
+        if 'tracemalloc' in modes:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(PROFILE_TRACE_FRAMES)
+                self.startedTracing = True
+            self.firstSnapshot = tracemalloc.take_snapshot().filter_traces(TRACE_FILTERS)
+
+    def addProfile(self, profile):
+        # merge the statistics of a finished cycle (called from the thread that ran the profile)
+        stats = pstats.Stats(profile)
+        with self.lock:
+            if self.stats is None:
+                self.stats = stats
+            else:
+                self.stats.add(stats)
+            self.profiledCycles += 1
+
+    def snapshot(self):
+        if 'tracemalloc' in self.modes and tracemalloc.is_tracing():
+            self.lastSnapshot = tracemalloc.take_snapshot().filter_traces(TRACE_FILTERS)
+
+    def finish(self):
+        # stop the profilers and return the reports by name
+        reports = {}
+        if self.sampler is not None:
+            self.sampler.stop()
+            reports['stacks'] = self.sampler.report()
+        if self.firstSnapshot is not None and self.lastSnapshot is not None:
+            reports['memory'] = self.memoryReport()
+        if self.startedTracing:
+            tracemalloc.stop()
+        with self.lock:
+            if self.stats is not None:
+                reports['cprofile'] = self.cProfileReport()
+        return reports
+
+    def cProfileReport(self):
+        output = io.StringIO()
+        output.write('# ' + str(self.profiledCycles) + ' cycles profiled over ' + str(self.cyclesDone)
+                     + ' display cycles\n')
+        self.stats.stream = output
+        self.stats.sort_stats('cumulative').print_stats(PROFILE_TOP)
+        self.stats.sort_stats('tottime').print_stats(PROFILE_TOP)
+        return output.getvalue()
+
+    def memoryReport(self):
+        lines = ['# traced memory: ' + str(tracemalloc.get_traced_memory()[0]) + ' bytes, peak '
+                 + str(tracemalloc.get_traced_memory()[1]) + ' bytes', '', '# largest allocations at the end']
+        lines.extend(str(stat) for stat in self.lastSnapshot.statistics('lineno')[:PROFILE_TOP])
+        lines.extend(['', '# growth since the start of the session'])
+        lines.extend(str(stat) for stat in self.lastSnapshot.compare_to(self.firstSnapshot, 'lineno')[:PROFILE_TOP])
+        return '\n'.join(lines) + '\n'
+
+class Profiler(object):
+    # runs profiling sessions on request - request() may be called from a signal handler
+
+    def __init__(self, path=None, modes=None):
+        self.path = path
+        self.modes = modes
+        self.requested = 0
+        self.session = None
+
+    def request(self, cycles=PROFILE_CYCLES):
+        # profile the next cycles display cycles (ignored while a session runs)
+        self.requested = cycles
+
+    def sessionModes(self):
+        modes = self.modes
+        if modes is None:
+            modes = os.environ.get('WEATHER_WORD_PROFILE_MODES', PROFILE_MODES)
+        modes = [mode.strip() for mode in modes.split(',') if mode.strip()] if isinstance(modes, str) else list(modes)
+        for mode in modes:
+            if mode not in MODES:
+                raise ValueError('unknown profile mode "' + mode + '" - expected some of ' + str(MODES))
+        return modes
+
+    @contextmanager
+    def cycle(self, display=True):
+        # profile the cycle run in the with block when a session runs - display cycles also start sessions and count
+        # towards their end
+        if display and self.session is None and self.requested:
+            cycles, self.requested = self.requested, 0
+            try:
+                modes = self.sessionModes()
+            except ValueError as e:
+                logger.warning('Not profiling: ' + str(e))
+                modes = []
+            if modes:
+                logger.info('Profiling ' + str(cycles) + ' cycles.', extra={'data': {'modes': modes}})
+                self.session = ProfileSession(cycles, modes)
+        session = self.session
+        if session is None:
+            yield
+            return
+        profile = None
+        if 'cprofile' in session.modes:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # another profiler is active in this thread (or, from Python 3.12, in the process)
+                profile = None
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+                session.addProfile(profile)
+            if display:
+                session.snapshot()
+                session.cyclesDone += 1
+                if session.cyclesDone >= session.cycles:
+                    self.session = None
+                    self.writeReports(session)
+
+    def writeReports(self, session):
+        # write the reports of a finished session to PATH_NAME/profile_<name>.txt
+        path = self.path if self.path is not None else PATH_NAME
+        written = []
+        for name, text in sorted(session.finish().items()):
+            try:
+                writeReport(path + 'profile_' + name + '.txt', text)
+                written.append(name)
+            except OSError as e:
+                logger.warning('Failed to write ' + name + ' profile: ' + str(e))
+        logger.info('Wrote profiles.', extra={'data': {'reports': written, 'cycles': session.cyclesDone,
+                                                       'seconds': round(time.time() - session.startTime, 1)}})
+
+PROFILER = Profiler()
+
+def setupProfiling(profiler=PROFILER):
+    # request a session from the WEATHER_WORD_PROFILE environment variable and on SIGUSR1 (must be called from the
+    # main thread)
+    cycles = os.environ.get('WEATHER_WORD_PROFILE')
+    if cycles:
+        try:
+            count = int(cycles)
+        except ValueError:
+            count = 0
+        if count > 0:
+            profiler.request(count)
+        else:
+            logger.warning('Not profiling: WEATHER_WORD_PROFILE is "' + cycles + '" - expected a number of cycles')
+    if hasattr(signal, 'SIGUSR1'):
+        signal.signal(signal.SIGUSR1, lambda signum, frame: profiler.request())
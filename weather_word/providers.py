@@ -0,0 +1,239 @@
+# weather_word/providers.py
+#
+# Weather providers. A provider builds the request for the query read from apiboot.txt, supplies the extractor that reads
+# its response (see extract.py) and the checks of it, and parses the result into a ForecastSeries - the normalized hourly
+# forecast of temperature, humidity, wind speed, condition code and civil time used by the rest of the program. Each
+# adapter maps the condition codes of its api onto the Weather Underground fctcode vocabulary the weather words are
+# wired for (see lexicon.FORECAST_PHRASES). A provider is created with the normalized fields it needs; only those are
+# requested where the api allows it and only those are decoded, the others are left at zero.
+#
+# The provider is chosen with the WEATHER_WORD_PROVIDER environment variable or PROVIDER in config.py:
+#   wunderground    the Weather Underground hourly api (apiboot.txt holds the api key and a query such as FL/Miami)
+#   open-meteo      the Open-Meteo forecast api (no key needed, the query line holds latitude,longitude)
+#   mock            generated forecasts without any network access, as a stand-in for testing
+
+import os
+import time
+import random
+import datetime
+from urllib.parse import urlencode
+
+from .config import OBJMAX, PROVIDER, OPEN_METEO_URL
+from .series import ForecastSeries
+from .extract import ForecastExtractor, DocumentExtractor
+from .fetch import FetchError, apiUrl, fetchWeatherData, verifyWeatherData, WUNDERGROUND_ATTRIBUTION
+from .parse import parseWeatherData
+
+FIELDS = ('temp', 'humid', 'wind', 'fct', 'fcttime')    # normalized fields of each hour (the ForecastSeries columns)
+
+def civilTime(hour, minute=0):
+    # the civil time of an hour of the day in the form the weather words log uses, e.g. 1:00 PM
+    return str((hour - 1) % 12 + 1) + ':' + str(minute).zfill(2) + (' AM' if hour < 12 else ' PM')
+
+class Provider(object):
+    # a source of hourly forecasts - subclasses fill in the request, extraction, checks and parsing of their api
+    name = None
+    attribution = None
+
+    def __init__(self, fields=FIELDS):
+        for field in fields:
+            if field not in FIELDS:
+                raise ValueError('unknown forecast field "' + field + '" - expected some of ' + str(FIELDS))
+        self.fields = tuple(fields)
+
+    def url(self, apiVal, baseUrl=None):
+        # url of the forecast for the api key, query and units read from apiboot.txt - baseUrl points the request at a
+        # mirror of the api
+        raise NotImplementedError
+
+    def newExtractor(self, hours=OBJMAX):
+        # extractor reading the first hours of a response as it arrives
+        raise NotImplementedError
+
+    def verify(self, obj):
+        # raise FetchError unless the extracted response holds forecast data
+        raise NotImplementedError
+
+    def parse(self, obj, units, hours=OBJMAX):
+        # the first hours of the extracted response as a ForecastSeries
+        raise NotImplementedError
+
+    def fetch(self, url, client=None, deadline=None, record=None):
+        # make one attempt to fetch and verify the forecast - returns None when it was not modified
+        return fetchWeatherData(url, client, deadline, record, self)
+
+class WundergroundProvider(Provider):
+    # the Weather Underground hourly api - its response is streamed hour by hour and its fctcode is the native vocabulary
+    name = 'wunderground'
+    attribution = WUNDERGROUND_ATTRIBUTION
+
+    # fields of each hour of the response holding each normalized field
+    SOURCE_FIELDS = {'temp': 'temp', 'humid': 'humidity', 'wind': 'wspd', 'fct': 'fctcode', 'fcttime': 'FCTTIME'}
+
+    def url(self, apiVal, baseUrl=None):
+        return apiUrl(apiVal, baseUrl)
+
+    def newExtractor(self, hours=OBJMAX):
+        return ForecastExtractor(hours, tuple(self.SOURCE_FIELDS[field] for field in self.fields))
+
+    def verify(self, obj):
+        verifyWeatherData(obj, 'temp' in self.fields)
+
+    def parse(self, obj, units, hours=OBJMAX):
+        if self.fields == FIELDS:
+            return parseWeatherData(obj, units, hours)
+        # only some fields were kept - the others are left at zero
+        series = ForecastSeries()
+        for hour in obj["hourly_forecast"][:hours]:
+            series.append(int(hour["temp"][units]) if "temp" in hour else 0, int(hour.get("humidity", 0)),
+                          int(hour["wspd"][units]) if "wspd" in hour else 0, int(hour.get("fctcode", 0)),
+                          str(hour["FCTTIME"]["civil"]) if "FCTTIME" in hour else '')
+        return series
+
+# WMO weather interpretation codes of Open-Meteo mapped onto the Weather Underground fctcode vocabulary
+WMO_FCTCODES = {
+    0: 1,                                   # clear sky
+    1: 1,                                   # mainly clear
+    2: 2,                                   # partly cloudy
+    3: 4,                                   # overcast
+    45: 6, 48: 6,                           # fog, depositing rime fog
+    51: 11, 53: 11, 55: 11,                 # drizzle
+    56: 23, 57: 23,                         # freezing drizzle
+    61: 13, 63: 13, 65: 13,                 # rain
+    66: 23, 67: 23,                         # freezing rain
+    71: 21, 73: 21, 75: 21,                 # snow fall
+    77: 16,                                 # snow grains
+    80: 11, 81: 11, 82: 11,                 # rain showers
+    85: 19, 86: 19,                         # snow showers
+    95: 15, 96: 15, 99: 15,                 # thunderstorms, with hail
+}
+
+class OpenMeteoProvider(Provider):
+    # the Open-Meteo forecast api - only the hourly variables of the needed fields are requested, for the next hours
+    name = 'open-meteo'
+    attribution = 'Weather data provided by Open-Meteo.com (CC BY 4.0)'
+
+    # hourly variables of the api holding each normalized field (the time is always sent)
+    SOURCE_FIELDS = {'temp': 'temperature_2m', 'humid': 'relative_humidity_2m', 'wind': 'wind_speed_10m',
+                     'fct': 'weather_code'}
+
+    def url(self, apiVal, baseUrl=None):
+        # apiVal[1] holds latitude,longitude - the api key line is not used
+        if baseUrl is None:
+            baseUrl = os.environ.get('WEATHER_WORD_OPEN_METEO_URL', OPEN_METEO_URL)
+        latitude, longitude = [part.strip() for part in str(apiVal[1]).split(',')]
+        english = apiVal[2] == 'english'
+        params = [('latitude', latitude), ('longitude', longitude),
+                  ('hourly', ','.join(self.SOURCE_FIELDS[field] for field in self.fields if field in self.SOURCE_FIELDS)),
+                  ('forecast_hours', OBJMAX), ('timezone', 'auto'),
+                  ('temperature_unit', 'fahrenheit' if english else 'celsius'),
+                  ('wind_speed_unit', 'mph' if english else 'kmh')]
+        return baseUrl + '?' + urlencode(params)
+
+    def newExtractor(self, hours=OBJMAX):
+        return DocumentExtractor(hours, self.project)
+
+    def project(self, obj, hours):
+        # keep the error and the first hours of the time and the requested variables
+        if not isinstance(obj, dict):
+            raise ValueError('expected a JSON object')
+        projected = dict((name, obj[name]) for name in ('error', 'reason') if name in obj)
+        hourly = obj.get('hourly')
+        if isinstance(hourly, dict):
+            names = ['time'] + [self.SOURCE_FIELDS[field] for field in self.fields if field in self.SOURCE_FIELDS]
+            projected['hourly'] = dict((name, hourly[name][:hours]) for name in names if isinstance(hourly.get(name), list))
+        return projected
+
+    def verify(self, obj):
+        if obj.get('error'):
+            raise FetchError('Received an error response from the API: "' + str(obj.get('reason')) + '"')
+        hourly = obj.get('hourly')
+        if not hourly or not hourly.get('time'):
+            raise FetchError('API failed to provide forecast data')
+        for field in self.fields:
+            if field not in self.SOURCE_FIELDS:
+                continue
+            # every hour needs a value - a missing one is sent as null
+            values = hourly.get(self.SOURCE_FIELDS[field], ())
+            if len(values) != len(hourly['time']) or any(value is None for value in values):
+                raise FetchError('API failed to provide forecast data')
+
+    def parse(self, obj, units, hours=OBJMAX):
+        # the units were chosen in the request - values are rounded to ints and weather codes mapped to fctcodes
+        # (verify() has made sure there are no missing values)
+        hourly = obj['hourly']
+        count = min(hours, len(hourly['time']))
+        columns = {}
+        for field in ('temp', 'humid', 'wind'):
+            name = self.SOURCE_FIELDS[field]
+            columns[field] = [int(round(value)) for value in hourly[name][:count]] if field in self.fields else [0] * count
+        fct = ([WMO_FCTCODES.get(code, 0) for code in hourly[self.SOURCE_FIELDS['fct']][:count]]
+               if 'fct' in self.fields else [0] * count)
+        if 'fcttime' in self.fields:
+            # times are local ISO 8601 times such as 2017-01-01T13:00
+            fcttime = [civilTime(int(stamp[11:13]), int(stamp[14:16])) for stamp in hourly['time'][:count]]
+        else:
+            fcttime = [''] * count
+        return ForecastSeries(columns['temp'], columns['humid'], columns['wind'], fct, fcttime)
+
+class MockProvider(Provider):
+    # generated forecasts for the query, without any network access - the forecast changes every hour and is the same
+    # for the same query, hour and seed
+    name = 'mock'
+    attribution = 'Weather data generated by the mock provider'
+
+    def __init__(self, fields=FIELDS, seed=None, hours=36, clock=time.time):
+        Provider.__init__(self, fields)
+        self.seed = seed
+        self.hours = hours
+        self.clock = clock
+
+    def url(self, apiVal, baseUrl=None):
+        return 'mock:' + str(apiVal[1]) + ':' + str(apiVal[2])
+
+    def newExtractor(self, hours=OBJMAX):
+        return DocumentExtractor(hours)
+
+    def fetch(self, url, client=None, deadline=None, record=None):
+        # generate the forecast for the query in url starting at the next hour
+        now = self.clock()
+        hourStart = int(now // 3600)
+        rng = random.Random(str(self.seed) + url + str(hourStart))
+        english = url.endswith(':english')
+        first = datetime.datetime.fromtimestamp((hourStart + 1) * 3600)
+        temp = rng.randint(-10, 100)
+        forecast = []
+        for i in range(self.hours):
+            temp = max(-20, min(110, temp + rng.randint(-3, 3)))
+            wind = rng.randint(0, 30)
+            hour = {'fcttime': civilTime((first.hour + i) % 24), 'humid': rng.randint(10, 100),
+                    'temp': temp if english else int((temp - 32) / 1.8), 'wind': wind if english else int(wind * 1.6),
+                    'fct': rng.choice(list(WMO_FCTCODES.values()))}
+            forecast.append(hour)
+        return {'hours': forecast}
+
+    def verify(self, obj):
+        if not obj.get('hours'):
+            raise FetchError('API failed to provide forecast data')
+
+    def parse(self, obj, units, hours=OBJMAX):
+        series = ForecastSeries()
+        for hour in obj['hours'][:hours]:
+            series.append(*[hour[field] if field in self.fields else (0 if field != 'fcttime' else '')
+                            for field in FIELDS])
+        return series
+
+# providers by name - each is called with the normalized fields it has to provide
+PROVIDERS = {
+    'wunderground': WundergroundProvider,
+    'open-meteo':   OpenMeteoProvider,
+    'mock':         MockProvider,
+}
+
+def createProvider(name=None, fields=FIELDS):
+    # create the weather provider by name (WEATHER_WORD_PROVIDER environment variable or PROVIDER)
+    if name is None:
+        name = os.environ.get('WEATHER_WORD_PROVIDER', PROVIDER)
+    if name not in PROVIDERS:
+        raise ValueError('unknown weather provider "' + name + '" - expected one of ' + str(sorted(PROVIDERS)))
+    return PROVIDERS[name](fields)
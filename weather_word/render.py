@@ -0,0 +1,91 @@
+# weather_word/render.py
+#
+# Assigns the weather data to frames of lit words.
+
+import functools
+
+from .config import HORIZONS, FRAME_CACHE_SIZE
+from .frame import EMPTY_FRAME
+from .lexicon import (WORD_FRAMES, HEADER_FRAMES, DEGREES_FRAME, HUNDREDS_FRAME, TEENS_FRAMES, TENS_FRAMES, ONES_FRAMES,
+                      WIND_FRAMES, FORECAST_FRAMES)
+from .aggregate import aggregateHorizons
+
+def pixelAssign(series, horizons=HORIZONS):
+    # assign pixel values to the weather data of a ForecastSeries - returns the current frame followed by the upcoming
+    # low and high frames of each horizon
+
+    # for current weather conditions
+    # light pixels for words representing 'currently', temperature, 'degrees &', wind and forecast
+    frames = [buildFrame('current', str(series.temp[0]), windBand(series.wind[0]), str(series.fct[0]))]
+
+    # for min and max upcoming weather conditions over the hours of each horizon
+    for extremes in aggregateHorizons(series, horizons):
+        # light pixels for words representing 'upcoming low', temperature, 'degrees &', wind and forecast
+        frames.append(buildFrame('low', str(extremes.minTemp), windBand(extremes.minWind), str(extremes.minFct)))
+
+        # light pixels for words representing 'upcoming high', temperature, 'degrees &', wind and forecast
+        frames.append(buildFrame('high', str(extremes.maxTemp), windBand(extremes.maxWind), str(extremes.maxFct)))
+
+    return tuple(frames)
+
+@functools.lru_cache(maxsize=FRAME_CACHE_SIZE)
+def buildFrame(header, temp, band, fct):
+    # build the frame for a header word, temperature, wind band and coded weather condition
+    # frames are memoized - use buildFrame.cache_info() for hit and miss counts
+    return (HEADER_FRAMES[header] | numberWords(temp) | DEGREES_FRAME
+            | WIND_FRAMES.get(band, EMPTY_FRAME) | forecastWords(fct))
+
+def numberWords(number):
+    # check number values and return the frame of the corresponding number words
+    frame = EMPTY_FRAME
+    if int(number) < 0:
+        # light pixels for words representing 'minus'
+        frame |= WORD_FRAMES['minus']
+        number = number.lstrip('-')
+    if len(number) == 3:
+        # light pixels for words representing number values in the hundreds
+        frame |= HUNDREDS_FRAME
+        if int(number[1:]) < 20 and int(number[1:]) >= 11:
+            frame |= teens(number[1:])
+        else:
+            frame |= tens(number[1]) | ones(number[2])
+    elif len(number) == 2:
+        if int(number) < 20 and int(number) >= 11:
+            frame |= teens(number)
+        else:
+            frame |= tens(number[0]) | ones(number[1])
+    else:
+        if int(number) == 0:
+            # light pixels for words representing 'zero'
+            frame |= WORD_FRAMES['zero']
+        else:
+            frame |= ones(number)
+    return frame
+
+def teens(n):
+    # look up the frame of words representing number values in the teens
+    return TEENS_FRAMES.get(n, EMPTY_FRAME)
+
+def tens(n):
+    # look up the frame of words representing number values in the tens
+    return TENS_FRAMES.get(n, EMPTY_FRAME)
+
+def ones(n):
+    # look up the frame of words representing number values in the ones
+    return ONES_FRAMES.get(n, EMPTY_FRAME)
+
+def windBand(number):
+    # classify the wind speed into the band of words used to display it
+    if int(number) >=5 and int(number) < 20:
+        return 'breezy'
+    elif int(number) >= 20:
+        return 'windy'
+    return None
+
+def windWords(number):
+    # look up the frame of words representing the wind speed ('breezy' or 'windy')
+    return WIND_FRAMES.get(windBand(number), EMPTY_FRAME)
+
+def forecastWords(number):
+    # look up the frame of words representing the coded weather condition
+    return FORECAST_FRAMES.get(number, EMPTY_FRAME)
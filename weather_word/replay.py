@@ -0,0 +1,195 @@
+# weather_word/replay.py
+#
+# Replays captured api responses (see capture.py) through the display pipeline - the streaming extractor, the checks of
+# fetchWeatherData(), parseWeatherData(), pixelAssign() and pixelWipe() on a simulated strip - either as fast as possible
+# or time-scaled, rotating the frames between captures as the display loop does. Months of recorded forecasts can so be
+# load-tested in seconds, and a capture that broke a unit in the field can be replayed on its own by its line number.
+#
+# Usage:
+#   python3 -m weather_word.replay                                 replay PATH_NAME/captures.jsonl as fast as possible
+#   python3 -m weather_word.replay captures.jsonl --speed 3600     replay an hour of recording every second
+#   python3 -m weather_word.replay captures.jsonl --line 42 -v     replay one capture and show what it displayed
+
+import sys
+import time
+import argparse
+
+from .config import OBJMAX, WIPE_TIME, FRAME_HOLD_TIME
+from .capture import capturePath, readCaptures
+from .fetch import FetchError
+from .httpclient import READ_CHUNK_SIZE
+from .providers import createProvider
+from .render import pixelAssign
+from .strip import createStrip
+from .animation import Animator
+from .effects import pixelWipe
+
+UNITS = 'english'                   # temperature units used to parse the captures
+STAGES = ('extract', 'parse', 'assign', 'wipe')
+
+def extractCapture(entry, provider, chunkSize=READ_CHUNK_SIZE):
+    # the forecast of a captured 200 response, extracted and checked by the provider as fetchWeatherData() does
+    if entry['status'] != 200:
+        raise FetchError('Failed to connect to API (HTTP ' + str(entry['status']) + ')')
+    body = (entry.get('body') or '').encode('utf8')
+    extractor = provider.newExtractor(OBJMAX)
+    try:
+        for start in range(0, len(body), chunkSize):
+            if extractor.feed(body[start:start + chunkSize]):
+                break
+        obj = extractor.close()
+    except ValueError:
+        raise FetchError('Failed to connect to API')
+    provider.verify(obj)
+    return obj
+
+class ReplayReport(object):
+    # outcome of a replay - counts, failed captures by line number and the time spent in each stage
+
+    def __init__(self):
+        self.replayed = 0
+        self.notModified = 0
+        self.failures = []              # (line number, error message)
+        self.invalid = []               # line numbers that hold no capture
+        self.timings = dict((stage, []) for stage in STAGES)
+        self.frames = 0
+        self.elapsed = 0.0
+
+    def summary(self):
+        lines = ['%d captures replayed, %d not modified, %d failed, %d invalid lines, %d frames in %.2f s'
+                 % (self.replayed, self.notModified, len(self.failures), len(self.invalid), self.frames, self.elapsed)]
+        for stage in STAGES:
+            times = sorted(self.timings[stage])
+            if times:
+                lines.append('  %-8s p50 %9.1f us   p99 %9.1f us   max %9.1f us   (%d calls)'
+                             % (stage, times[len(times) // 2] * 1e6, times[min(len(times) - 1, int(len(times) * 0.99))] * 1e6,
+                                times[-1] * 1e6, len(times)))
+        for number, error in self.failures:
+            lines.append('  line ' + str(number) + ': ' + error)
+        if self.invalid:
+            lines.append('  no capture on lines ' + ', '.join(str(number) for number in self.invalid[:20])
+                         + (' ...' if len(self.invalid) > 20 else ''))
+        return '\n'.join(lines)
+
+class Replayer(object):
+    # plays captures through the pipeline onto a strip - speed None replays as fast as possible (wipes take no time
+    # and every frame is shown once), otherwise speed times faster than the captures were recorded
+
+    def __init__(self, strip=None, units=UNITS, speed=None, verbose=False, clock=time.monotonic, sleep=time.sleep):
+        if strip is None:
+            strip = createStrip('simulated')
+            strip.begin()
+        self.strip = strip
+        self.units = units
+        self.speed = speed
+        self.verbose = verbose
+        self.clock = clock
+        self.sleep = sleep
+        self.animator = Animator(strip)
+        self.report = ReplayReport()
+        self.frames = None
+        self.providers = {}
+
+    def timed(self, stage, function, *args):
+        start = self.clock()
+        result = function(*args)
+        self.report.timings[stage].append(self.clock() - start)
+        return result
+
+    def wipe(self, frame):
+        duration = 0 if self.speed is None else WIPE_TIME / self.speed
+        self.timed('wipe', pixelWipe, self.strip, frame, duration, self.animator)
+        self.report.frames += 1
+
+    def replayEntry(self, number, entry):
+        # take one capture through the pipeline - a 304 keeps the frames of the previous capture
+        if entry['status'] == 304:
+            self.report.notModified += 1
+            return
+        try:
+            # captures without a provider name were made by Weather Underground
+            name = entry.get('provider', 'wunderground')
+            if name not in self.providers:
+                self.providers[name] = createProvider(name)
+            provider = self.providers[name]
+            obj = self.timed('extract', extractCapture, entry, provider)
+            series = self.timed('parse', provider.parse, obj, self.units)
+            self.frames = self.timed('assign', pixelAssign, series)
+        except FetchError as e:
+            self.fail(number, entry, str(e))
+            return
+        except Exception as e:
+            # the worker counts a response it cannot parse as a failed attempt and keeps the last good forecast
+            self.fail(number, entry, 'pipeline failed: ' + repr(e))
+            return
+        self.report.replayed += 1
+        if self.verbose:
+            print('line %d  %s  %s  temp %d  wind %d  fct %d  frames %s'
+                  % (number, time.ctime(entry.get('time', 0)), entry.get('query'), series.temp[0], series.wind[0],
+                     series.fct[0], ' '.join('%x' % frame.bits for frame in self.frames)))
+
+    def fail(self, number, entry, error):
+        self.report.failures.append((number, error))
+        if self.verbose:
+            print('line %d  %s  %s  failed: %s' % (number, time.ctime(entry.get('time', 0)), entry.get('query'), error))
+
+    def rotate(self, until):
+        # show the frames of the latest forecast in turn until the clock reaches until, as the display loop does
+        while self.frames and self.clock() < until:
+            for frame in self.frames:
+                self.wipe(frame)
+                wait = min(FRAME_HOLD_TIME / self.speed, until - self.clock())
+                if wait <= 0:
+                    return
+                self.sleep(wait)
+
+    def run(self, captures):
+        # replay (line number, capture) pairs and return the ReplayReport
+        start = self.clock()
+        firstTime = None
+        for number, entry in captures:
+            if entry is None:
+                self.report.invalid.append(number)
+                continue
+            if self.speed is not None:
+                recorded = entry.get('time', 0)
+                if firstTime is None:
+                    firstTime = recorded
+                self.rotate(start + (recorded - firstTime) / self.speed)
+            self.replayEntry(number, entry)
+            if self.speed is None and entry['status'] != 304:
+                for frame in self.frames or ():
+                    self.wipe(frame)
+        self.report.elapsed = self.clock() - start
+        return self.report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python3 -m weather_word.replay',
+                                     description='Replay captured api responses through the weather_word display pipeline.')
+    parser.add_argument('captures', nargs='*', help='capture files in the order to replay them (default: the capture '
+                        'file under PATH_NAME)')
+    parser.add_argument('--speed', type=float, help='replay this many times faster than recorded (default: as fast as '
+                        'possible)')
+    parser.add_argument('--units', choices=('english', 'metric'), default=UNITS, help='temperature units')
+    parser.add_argument('--line', type=int, action='append', default=[], help='replay only this line (repeatable)')
+    parser.add_argument('-v', '--verbose', action='store_true', help='print each capture and the frames it displays')
+    args = parser.parse_args(argv)
+    if args.speed is not None and args.speed <= 0:
+        parser.error('--speed must be positive')
+
+    def captures():
+        for path in args.captures or [capturePath()]:
+            for number, entry in readCaptures(path):
+                if not args.line or number in args.line:
+                    yield number, entry
+
+    replayer = Replayer(units=args.units, speed=args.speed, verbose=args.verbose)
+    report = replayer.run(captures())
+    print(report.summary())
+    if hasattr(replayer.strip, 'stats'):
+        print('strip: ' + str(replayer.strip.stats()))
+    print('animation: ' + str(replayer.animator.stats()))
+    return 1 if report.failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,75 @@
+# weather_word/retry.py
+#
+# Retry policy for the forecast request. Failed attempts are retried with exponential backoff and random jitter, and
+# after MAX_FAIL_LOOP_COUNT consecutive failures the circuit opens: no request is made for CIRCUIT_OPEN_TIME seconds,
+# after which the circuit is half open and a single probe request decides whether it closes again or re-opens.
+
+import time
+import random
+
+from .config import RETRY_BASE_DELAY, TIME_BETWEEN_FAILED, RETRY_JITTER, MAX_FAIL_LOOP_COUNT, CIRCUIT_OPEN_TIME
+
+CLOSED = 'closed'                   # requests are made, failures are retried with backoff
+OPEN = 'open'                       # requests are held back until the open time has passed
+HALF_OPEN = 'half-open'             # one probe request is allowed through
+
+class RetryPolicy(object):
+    # backoff and circuit breaker state of a series of requests
+
+    def __init__(self, baseDelay=RETRY_BASE_DELAY, maxDelay=TIME_BETWEEN_FAILED, jitter=RETRY_JITTER,
+                 failureThreshold=MAX_FAIL_LOOP_COUNT, openTime=CIRCUIT_OPEN_TIME, clock=time.time, rng=None):
+        self.baseDelay = baseDelay
+        self.maxDelay = maxDelay
+        self.jitter = jitter
+        self.failureThreshold = failureThreshold
+        self.openTime = openTime
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self.state = CLOSED
+        self.failures = 0               # consecutive failures since the last success
+        self.openedAt = None
+        self.totalFailures = 0
+        self.totalSuccesses = 0
+        self.opens = 0                  # times the circuit has opened
+
+    def allowRequest(self):
+        # True when a request may be made now - moves an open circuit to half open once its open time has passed
+        if self.state == OPEN:
+            if self.clock() < self.openedAt + self.openTime:
+                return False
+            self.state = HALF_OPEN
+        return True
+
+    def recordSuccess(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.openedAt = None
+        self.totalSuccesses += 1
+
+    def recordFailure(self):
+        # count a failed request - opens the circuit at the failure threshold, or re-opens it when a probe failed
+        self.failures += 1
+        self.totalFailures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failureThreshold:
+            if self.state != OPEN:
+                self.opens += 1
+            self.state = OPEN
+            self.openedAt = self.clock()
+
+    def backoff(self):
+        # exponential delay for the current failure count with up to RETRY_JITTER of it taken off at random, so that
+        # several units failing together do not retry in step
+        delay = min(self.maxDelay, self.baseDelay * 2 ** max(0, self.failures - 1))
+        return delay * (1.0 - self.jitter * self.rng.random())
+
+    def nextDelay(self):
+        # seconds to wait before the next request
+        if self.state == OPEN:
+            return max(0.0, self.openedAt + self.openTime - self.clock())
+        if self.failures == 0:
+            return 0.0
+        return self.backoff()
+
+    def stats(self):
+        return {'state': self.state, 'failures': self.failures, 'total_failures': self.totalFailures,
+                'total_successes': self.totalSuccesses, 'opens': self.opens}
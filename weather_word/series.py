@@ -0,0 +1,78 @@
+# weather_word/series.py
+#
+# Hours of forecast stored in typed columns. The api sends every value as a string; parseWeatherData() converts each one
+# to an int once and stores it in a compact array('h') column (two bytes per value), so the frames are built from native
+# ints and a forecast of hundreds of hours stays small. The string forms used by the word lookups and the log are
+# derived on demand.
+
+from array import array
+
+class Hour(object):
+    # the values of one hour of forecast
+    __slots__ = ('temp', 'humid', 'wind', 'fct', 'fcttime')
+
+    def __init__(self, temp, humid, wind, fct, fcttime):
+        self.temp = temp
+        self.humid = humid
+        self.wind = wind
+        self.fct = fct
+        self.fcttime = fcttime
+
+    def __repr__(self):
+        return ('Hour(temp=' + str(self.temp) + ', humid=' + str(self.humid) + ', wind=' + str(self.wind) + ', fct='
+                + str(self.fct) + ', fcttime=' + repr(self.fcttime) + ')')
+
+class ForecastSeries(object):
+    # temperature, humidity, wind speed and coded weather condition columns with the civil time of each hour
+    __slots__ = ('temp', 'humid', 'wind', 'fct', 'fcttime')
+
+    def __init__(self, temp=(), humid=(), wind=(), fct=(), fcttime=()):
+        self.temp = array('h', temp)
+        self.humid = array('h', humid)
+        self.wind = array('h', wind)
+        self.fct = array('h', fct)
+        self.fcttime = list(fcttime)
+        if not len(self.temp) == len(self.humid) == len(self.wind) == len(self.fct) == len(self.fcttime):
+            raise ValueError('the columns of a ForecastSeries must have the same length')
+
+    @classmethod
+    def fromStrings(cls, temp, humid, wind, fct, fcttime):
+        # build a series from parallel lists of the api strings, converting each value once
+        return cls(map(int, temp), map(int, humid), map(int, wind), map(int, fct), map(str, fcttime))
+
+    def append(self, temp, humid, wind, fct, fcttime):
+        self.temp.append(temp)
+        self.humid.append(humid)
+        self.wind.append(wind)
+        self.fct.append(fct)
+        self.fcttime.append(fcttime)
+
+    def __len__(self):
+        return len(self.temp)
+
+    def __getitem__(self, i):
+        return Hour(self.temp[i], self.humid[i], self.wind[i], self.fct[i], self.fcttime[i])
+
+    def __iter__(self):
+        for i in range(len(self.temp)):
+            yield self[i]
+
+    def __eq__(self, other):
+        if not isinstance(other, ForecastSeries):
+            return NotImplemented
+        return (self.temp == other.temp and self.humid == other.humid and self.wind == other.wind
+                and self.fct == other.fct and self.fcttime == other.fcttime)
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def strings(self):
+        # the columns as parallel lists of strings, the form the api sent them in (for the log)
+        return ([str(v) for v in self.temp], [str(v) for v in self.humid], [str(v) for v in self.wind],
+                [str(v) for v in self.fct], list(self.fcttime))
+
+    def __repr__(self):
+        return 'ForecastSeries(' + str(len(self)) + ' hours)'
@@ -0,0 +1,158 @@
+# weather_word/strip.py
+#
+# LED strip backends. The hardware NeoPixel library is only imported when the hardware backend is used, so the rest of
+# the program can run on any computer with the simulated strip.
+
+import os
+import time
+import collections
+
+from .config import (LED_COUNT, LED_PIN, LED_FREQ_HZ, LED_DMA, LED_BRIGHTNESS, LED_INVERT, STRIP_BACKEND,
+                     SIMULATED_WIRE_TIME, SIMULATED_FRAME_HISTORY, DIFF_UPDATES)
+
+def Color(red, green, blue, white=0):
+    # pack a color into the 32-bit value used by the strip (same layout as the rpi_ws281x library)
+    return (white << 24) | (red << 16) | (green << 8) | blue
+
+class SimulatedStrip(object):
+    # in-memory drop-in for Adafruit_NeoPixel used to run and profile the display without the LED hardware
+    # every show() records the pushed frame and can optionally wait out the WS2812 wire time
+
+    WS2812_BITS_PER_PIXEL = 24
+    WS2812_RESET_TIME = 0.00005     # latch time in seconds after each transfer
+
+    def __init__(self, num, pin=LED_PIN, freq_hz=LED_FREQ_HZ, dma=LED_DMA, invert=LED_INVERT, brightness=LED_BRIGHTNESS,
+                 wireTime=SIMULATED_WIRE_TIME, history=SIMULATED_FRAME_HISTORY):
+        self.num = num
+        self.freq_hz = freq_hz
+        self.brightness = brightness
+        self.wireTime = wireTime
+        self.pixels = [0]*num
+        self.frames = collections.deque(maxlen=history)
+        self.showCount = 0
+        self.begun = False
+
+    def begin(self):
+        self.begun = True
+
+    def numPixels(self):
+        return self.num
+
+    def setPixelColor(self, n, color):
+        self.pixels[n] = color
+
+    def setPixelColorRGB(self, n, red, green, blue, white=0):
+        self.pixels[n] = Color(red, green, blue, white)
+
+    def getPixelColor(self, n):
+        return self.pixels[n]
+
+    def getPixels(self):
+        return self.pixels
+
+    def setPixels(self, colors):
+        # set the colors of all pixels at once
+        self.pixels[:] = colors
+
+    def setBrightness(self, brightness):
+        self.brightness = brightness
+
+    def getBrightness(self):
+        return self.brightness
+
+    def transferTime(self):
+        # time in seconds the WS2812 protocol needs to push one frame to the strip
+        return self.num * self.WS2812_BITS_PER_PIXEL / float(self.freq_hz) + self.WS2812_RESET_TIME
+
+    def show(self):
+        if not self.begun:
+            raise RuntimeError('begin() must be called before show()')
+        self.frames.append(tuple(self.pixels))
+        self.showCount += 1
+        if self.wireTime:
+            time.sleep(self.transferTime())
+
+class DiffStrip(object):
+    # wraps a strip and keeps the colors last written to it, so that only changed pixels are passed through to the
+    # strip and show() is skipped when nothing changed since the last show()
+
+    def __init__(self, strip):
+        self.strip = strip
+        self.pixels = [None]*strip.numPixels()     # colors held by the strip (None until first written)
+        self.dirty = False
+        self.pixelsWritten = 0
+        self.pixelsSkipped = 0
+        self.showsSent = 0
+        self.showsSkipped = 0
+
+    def begin(self):
+        self.strip.begin()
+
+    def numPixels(self):
+        return len(self.pixels)
+
+    def setPixelColor(self, n, color):
+        if self.pixels[n] == color:
+            self.pixelsSkipped += 1
+            return
+        self.pixels[n] = color
+        self.strip.setPixelColor(n, color)
+        self.pixelsWritten += 1
+        self.dirty = True
+
+    def getPixelColor(self, n):
+        return self.pixels[n]
+
+    def setPixels(self, colors):
+        # set the colors of all pixels at once, passing only the changed pixels through
+        for i in self.changedPixels(colors):
+            self.setPixelColor(i, colors[i])
+
+    def setBrightness(self, brightness):
+        self.strip.setBrightness(brightness)
+        self.dirty = True
+
+    def getBrightness(self):
+        return self.strip.getBrightness()
+
+    def changedPixels(self, colors):
+        # indices of the pixels whose color differs from colors
+        pixels = self.pixels
+        return [i for i, color in enumerate(colors) if pixels[i] != color]
+
+    def show(self):
+        if not self.dirty:
+            self.showsSkipped += 1
+            return
+        self.strip.show()
+        self.showsSent += 1
+        self.dirty = False
+
+    def stats(self):
+        return {'pixels_written': self.pixelsWritten, 'pixels_skipped': self.pixelsSkipped,
+                'shows': self.showsSent, 'shows_skipped': self.showsSkipped}
+
+# GPIO pins driven by the second PWM channel of the Pi - a strip on one of these uses channel 1
+PWM1_PINS = (13, 19, 41, 45, 53)
+
+def neopixelStrip(num, pin=LED_PIN, freq_hz=LED_FREQ_HZ, dma=LED_DMA, invert=LED_INVERT, brightness=LED_BRIGHTNESS):
+    # create the hardware strip - the NeoPixel library is only imported when the hardware is used
+    from neopixel import Adafruit_NeoPixel
+    return Adafruit_NeoPixel(num, pin, freq_hz, dma, invert, brightness, 1 if pin in PWM1_PINS else 0)
+
+# strip backends by name - each is called with the Adafruit_NeoPixel arguments and returns an object providing
+# begin(), numPixels(), setPixelColor() and show()
+STRIP_BACKENDS = {
+    'neopixel':  neopixelStrip,
+    'simulated': SimulatedStrip,
+}
+
+def createStrip(backend=None, brightness=LED_BRIGHTNESS, diff=DIFF_UPDATES, pin=LED_PIN, dma=LED_DMA):
+    # create the LED strip using the configured backend (WEATHER_WORD_STRIP environment variable or STRIP_BACKEND)
+    # wrapped in a DiffStrip unless diff is False - further strips need their own GPIO pin and DMA channel
+    if backend is None:
+        backend = os.environ.get('WEATHER_WORD_STRIP', STRIP_BACKEND)
+    if backend not in STRIP_BACKENDS:
+        raise ValueError('unknown strip backend "' + backend + '" - expected one of ' + str(sorted(STRIP_BACKENDS)))
+    strip = STRIP_BACKENDS[backend](LED_COUNT, pin, LED_FREQ_HZ, dma, LED_INVERT, brightness)
+    return DiffStrip(strip) if diff else strip
@@ -0,0 +1,396 @@
+# weather_word/worker.py
+#
+# Background fetch worker. The worker thread fetches, parses and assigns the weather data of the configured provider
+# (see providers.py) on its own schedule and publishes each good forecast into a ForecastSlot, so the display loop keeps
+# rotating the last good frames while the api is retried with backoff (see retry.py). Responses are cached on disk (see
+# cache.py) and reused while they are fresh; once expired they are revalidated with a conditional request over a
+# kept-alive connection, and a 304 Not Modified answer reuses the forecast already parsed from them. A worker can also
+# fetch a fixed query for several slots (see displays.py), parsing the response once for each units the slots are
+# shown in; such workers are not started as threads of their own but have their fetch cycles run in turn by the threads
+# of a FetchPool, sharing the client and hedging pool of the thread.
+
+import time
+import logging
+import threading
+
+from .config import TIME_BETWEEN_CALLS, MAX_FAIL_LOOP_COUNT, CACHE_TTL, HORIZONS
+from .fetch import FetchError, FetchTimeout, readApiBootFile
+from .providers import createProvider
+from .hedge import createHedger
+from .cache import saveCachedForecast, loadCachedForecast, loadCacheEntry, discardCachedForecast
+from .httpclient import HttpClient, Deadline
+from .retry import RetryPolicy, CLOSED, OPEN
+from .render import pixelAssign, buildFrame
+from .log import flushLog
+from .metrics import (STAGE_SECONDS, FETCH_ATTEMPTS, FORECASTS_PUBLISHED, LAST_SUCCESS, RETRY_FAILURES, CIRCUIT_OPEN,
+                      CIRCUIT_OPENS, HTTP_REQUESTS, HTTP_CONNECTIONS, HTTP_WIRE_BYTES, HTTP_TIMEOUTS, writeMetricsFile)
+from .profiling import PROFILER
+
+logger = logging.getLogger(__name__)
+
+def fetchTimings(deadline, elapsed=None):
+    # seconds spent in each stage of a fetch attempt and in total (elapsed when given), for the log
+    timings = dict((stage, round(seconds, 3)) for stage, seconds in deadline.timings.items())
+    timings['total'] = round(deadline.elapsed() if elapsed is None else elapsed, 3)
+    return timings
+
+class Forecast(object):
+    # parsed weather data (a ForecastSeries) with its frames of weather words
+    __slots__ = ('series', 'frames', 'fetchedAt')
+
+    def __init__(self, series, frames, fetchedAt):
+        self.series = series
+        self.frames = frames
+        self.fetchedAt = fetchedAt
+
+class ForecastSlot(object):
+    # thread-safe holder of the latest good forecast and of the fetch status
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.forecast = None
+        self.version = 0
+        self.failures = 0               # consecutive failed attempts since the last good forecast
+        self.circuit = CLOSED           # state of the retry policy circuit breaker
+        self.fatal = None               # reason the worker stopped, once it gave up
+
+    def publish(self, forecast):
+        with self.condition:
+            self.forecast = forecast
+            self.version += 1
+            self.failures = 0
+            self.condition.notify_all()
+
+    def reportStatus(self, failures, circuit):
+        with self.condition:
+            self.failures = failures
+            self.circuit = circuit
+            self.condition.notify_all()
+
+    def reportFatal(self, reason):
+        with self.condition:
+            self.fatal = reason
+            self.condition.notify_all()
+
+    def latest(self):
+        # latest good forecast (None before the first one) and its version
+        with self.condition:
+            return self.forecast, self.version
+
+    def waitForUpdate(self, version, timeout):
+        # wait up to timeout seconds for a forecast newer than version or a change of status - returns True if one
+        # arrived
+        with self.condition:
+            self.condition.wait_for(lambda: self.version != version or self.fatal is not None, timeout)
+            return self.version != version
+
+class FetchWorker(threading.Thread):
+    # fetches weather data every TIME_BETWEEN_CALLS seconds (or when the cached response expires), retries failed
+    # attempts as the retry policy allows and publishes the parsed forecast into the slot
+    # query is a (query, units) pair used instead of the query lines of apiboot.txt, cacheName the cache file it uses,
+    # client and hedgePool the client and hedging thread pool it shares with the other workers of a fetch thread
+
+    def __init__(self, slot, retry=None, provider=None, query=None, cacheName=None, client=None, hedgePool=None):
+        threading.Thread.__init__(self, name='fetch-worker' + ('-' + '-'.join(query) if query else ''))
+        self.daemon = True
+        self.slot = slot
+        self.query = query
+        self.label = ' '.join(query) if query else 'main'     # worker label of the retry metrics
+        self.cacheName = cacheName
+        self.sharedSlots = []           # (units, slot) of the further slots the forecast is published into
+        self.stopping = threading.Event()
+        self.nextFetchTime = 0
+        self.client = client or HttpClient()
+        self.retry = retry or RetryPolicy()
+        self.provider = provider or createProvider()
+        self.hedger = createHedger(self.provider, self.client, pool=hedgePool)
+        self.lastUrl = None
+        self.lastObj = None             # last good response for lastUrl, the one the client holds validators for
+        self.publishedObj = None        # response and units the published forecast was parsed from
+        self.publishedUnits = None
+        self.exportedOpens = 0          # circuit breaker openings already added to the metrics
+        self.clientStats = {}           # connection statistics of the client when the current attempt started
+
+    def stop(self):
+        self.stopping.set()
+
+    def addSlot(self, units, slot):
+        # publish the forecast into slot as well, parsed for units
+        self.sharedSlots.append((units, slot))
+
+    def slots(self):
+        return [self.slot] + [slot for units, slot in self.sharedSlots]
+
+    def readApiValues(self):
+        # api key, query and units - the api key is always read from apiboot.txt
+        apiVal = readApiBootFile()
+        if self.query is not None:
+            apiVal = [apiVal[0], self.query[0], self.query[1]]
+        return apiVal
+
+    def warmStart(self):
+        # publish a still-fresh cached forecast before the worker is started - returns True when one was published
+        # the worker then waits for the cached forecast to expire before fetching
+        try:
+            apiVal = self.readApiValues()
+            url = self.provider.url(apiVal)
+        except Exception:
+            return False
+        self.restoreResponse(url)
+        return self.publishCachedForecast(url, apiVal[2])
+
+    def publishCachedForecast(self, url, units):
+        # publish the cached response for url while it is fresh - returns False when there is none or when it cannot be
+        # parsed, in which case it is discarded so that the forecast is fetched again
+        cached = loadCachedForecast(url, name=self.cacheName)
+        if cached is None:
+            return False
+        obj, fetchedAt = cached
+        logger.info('Using cached forecast fetched at ' + time.ctime(fetchedAt) + '.')
+        try:
+            self.publishForecast(obj, units, fetchedAt)
+        except Exception:
+            logger.exception('Discarding the cached forecast, it could not be parsed.')
+            discardCachedForecast(self.cacheName)
+            self.restoreResponse(url)
+            return False
+        self.lastObj = obj
+        self.nextFetchTime = fetchedAt + CACHE_TTL
+        return True
+
+    def restoreResponse(self, url):
+        # take the last response for url and its validators from the cache so it can be revalidated
+        entry = loadCacheEntry(url, self.cacheName)
+        self.lastUrl = url
+        if entry is None:
+            self.lastObj = None
+            self.client.setValidators(url, None, None)
+        else:
+            self.lastObj = entry['payload']
+            self.client.setValidators(url, entry['etag'], entry['lastModified'])
+
+    def run(self):
+        try:
+            self.fetchLoop()
+        except Exception as e:
+            self.fail(e)
+            raise
+        finally:
+            self.client.close()
+            if self.hedger is not None:
+                self.hedger.close()
+            flushLog()
+
+    def fail(self, e):
+        # report the exception the worker stopped on to its slots
+        logger.exception('The fetch worker failed.')
+        for slot in self.slots():
+            slot.reportFatal('fetch worker failed: ' + repr(e))
+
+    def fetchLoop(self):
+        # run fetch cycles until stopped
+        while not self.stopping.wait(max(0, self.nextFetchTime - time.time())):
+            if not self.runCycle():
+                return
+
+    def runCycle(self):
+        # run one fetch cycle, writing its log and metrics in one go at its end - returns False when the worker has to
+        # stop
+        try:
+            with PROFILER.cycle(display=False), STAGE_SECONDS.time(stage='cycle'):
+                return self.fetchCycle()
+        finally:
+            self.writeMetrics()
+            flushLog()
+
+    def writeMetrics(self):
+        # write the metrics file (see metrics.py) - a failure to write it is logged and otherwise ignored
+        try:
+            writeMetricsFile()
+        except OSError as e:
+            logger.warning('Failed to write metrics file: ' + str(e))
+
+    def recordAttempt(self, deadline, result, elapsed=None):
+        # count a fetch attempt by result and record its stage timings (elapsed seconds in total when given) and the
+        # retry and connection statistics
+        FETCH_ATTEMPTS.inc(result=result)
+        for stage, seconds in deadline.timings.items():
+            STAGE_SECONDS.observe(seconds, stage=stage)
+        STAGE_SECONDS.observe(deadline.elapsed() if elapsed is None else elapsed, stage='fetch')
+        retryStats = self.retry.stats()
+        RETRY_FAILURES.set(retryStats['failures'], worker=self.label)
+        CIRCUIT_OPEN.set(1 if self.retry.state == OPEN else 0, worker=self.label)
+        # the counters are shared by all workers (and the client by the workers of a fetch thread, which fetch in turn),
+        # so each adds what the statistics grew by during its own attempt
+        CIRCUIT_OPENS.inc(retryStats['opens'] - self.exportedOpens)
+        self.exportedOpens = retryStats['opens']
+        stats = self.client.stats()
+        for name, counter in (('requests', HTTP_REQUESTS), ('connections', HTTP_CONNECTIONS),
+                              ('wire_bytes', HTTP_WIRE_BYTES), ('timeouts', HTTP_TIMEOUTS)):
+            counter.inc(stats[name] - self.clientStats.get(name, 0))
+
+    def fetchCycle(self):
+        # make one attempt to fetch and publish weather data when the retry policy allows it - returns False when the
+        # worker has to stop
+        if not self.retry.allowRequest():
+            self.nextFetchTime = time.time() + self.retry.nextDelay()
+            return True
+        data = {'attempt': self.retry.failures + 1}
+        if self.query is not None:
+            data['worker'] = self.label
+        logger.info('Attempting to fetch data.', extra={'data': data})
+        try:
+            # fetch API key and query values from boot file
+            apiVal = self.readApiValues()
+            url = self.provider.url(apiVal)
+        except Exception:
+            logger.critical('Failed to read apiboot.txt file. Terminating Program. Check that file exists. Check that the file contains your API key. Check that the file has at least one query line uncommented.')
+            for slot in self.slots():
+                slot.reportFatal('failed to read apiboot file')
+            return False
+        if url != self.lastUrl:
+            self.restoreResponse(url)
+
+        # use the cached response while it is fresh (for example after a restart), otherwise fetch and cache it
+        if self.publishCachedForecast(url, apiVal[2]):
+            return True
+        self.clientStats = self.client.stats()
+        deadline = Deadline()
+        elapsed = None
+        try:
+            if self.hedger is not None:
+                endpoint, obj = self.hedger.fetch(apiVal, deadline, self.lastObj)
+            else:
+                endpoint = None
+                obj = self.provider.fetch(url, self.client, deadline)
+                if obj is None and self.lastObj is None:
+                    # validators without the response they belong to - ask for the whole response next time
+                    self.client.setValidators(url, None, None)
+                    raise FetchError('Not modified, but no earlier response is held')
+            elapsed = deadline.elapsed()
+            fetchedAt = time.time()
+            notModified = obj is None
+            if notModified:
+                # the response held from the previous fetch (or the cache) is still current
+                obj = self.lastObj
+            else:
+                logger.debug('Response payload.', extra={'data': obj})
+
+            # an answer from another endpoint of the hedger is parsed by the provider of that endpoint, and is only
+            # kept as the response for url when the endpoint is a mirror of the api
+            provider = self.provider
+            keep = primary = True
+            if endpoint is not None:
+                provider = endpoint.provider
+                primary = endpoint is self.hedger.primary
+                keep = endpoint.mirrors(self.hedger.primary)
+
+            # the response is parsed before the attempt counts as a success, so one that passes the checks of the
+            # provider but cannot be parsed is retried like any other failure and the last good forecast stays up
+            forecasts = None
+            if not (notModified and obj is self.publishedObj and apiVal[2] == self.publishedUnits):
+                try:
+                    forecasts = self.buildForecasts(obj, apiVal[2], fetchedAt, provider)
+                except Exception as e:
+                    logger.exception('Failed to parse the response.')
+                    self.forgetResponse(endpoint, url, apiVal)
+                    raise FetchError('Failed to parse the response: ' + repr(e))
+        except FetchError as e:
+            self.retry.recordFailure()
+            self.recordAttempt(deadline, 'timeout' if isinstance(e, FetchTimeout) else 'error', elapsed)
+            delay = self.retry.nextDelay()
+            data = {'attempt': self.retry.failures, 'retry_in': round(delay, 1),
+                    'timings': fetchTimings(deadline, elapsed), 'retry': self.retry.stats()}
+            if self.retry.state == OPEN:
+                logger.error(str(e) + '. Pausing requests after ' + str(self.retry.failures) + ' consecutive attempts to retrieve data from API.', extra={'data': data})
+            else:
+                logger.warning(str(e) + '. Requests will pause after ' + str(MAX_FAIL_LOOP_COUNT) + ' consecutive attempts.', extra={'data': data})
+            for slot in self.slots():
+                slot.reportStatus(self.retry.failures, self.retry.state)
+            self.nextFetchTime = time.time() + delay
+            return True
+        self.retry.recordSuccess()
+        for slot in self.slots():
+            slot.reportStatus(0, self.retry.state)
+        self.recordAttempt(deadline, 'not_modified' if notModified else 'ok', elapsed)
+        LAST_SUCCESS.set(fetchedAt, worker=self.label)
+        data = {'timings': fetchTimings(deadline, elapsed), 'http': self.client.stats(), 'not_modified': notModified}
+        if self.hedger is not None:
+            data['hedge'] = self.hedger.stats()
+        logger.info('Fetched data.', extra={'data': data})
+        if primary:
+            self.lastObj = obj
+        self.nextFetchTime = fetchedAt + TIME_BETWEEN_CALLS
+        if forecasts is None:
+            logger.info('Keeping the current forecast.')
+        else:
+            self.publishForecasts(obj, apiVal[2], forecasts)
+
+        # the response is only cached once it has been parsed, so the cache never holds one that fails at startup
+        if keep:
+            try:
+                # the validators of the provider do not belong to an answer from another endpoint
+                etag, lastModified = self.client.getValidators(url) if primary else (None, None)
+                saveCachedForecast(url, obj, fetchedAt, etag, lastModified, self.cacheName)
+            except OSError as e:
+                logger.warning('Failed to write forecast cache: ' + str(e))
+        return True
+
+    def forgetResponse(self, endpoint, url, apiVal):
+        # drop the validators of a response that cannot be parsed, so that the endpoint (the provider when None) sends
+        # the whole response next time instead of a 304 for it
+        if endpoint is None or endpoint is self.hedger.primary:
+            self.client.setValidators(url, None, None)
+        else:
+            endpoint.client.setValidators(endpoint.url(apiVal), None, None)
+        if endpoint is not None:
+            endpoint.lastObj = None
+
+    def publishForecast(self, obj, units, fetchedAt, provider=None):
+        # parse and assign the weather data (a response of provider, the worker's provider by default) and publish the
+        # forecast into the slots
+        self.publishForecasts(obj, units, self.buildForecasts(obj, units, fetchedAt, provider))
+
+    def buildForecasts(self, obj, units, fetchedAt, provider=None):
+        # parse and assign the weather data for units and for the units of the shared slots - returns the forecast for
+        # each units
+        forecasts = {units: self.buildForecast(obj, units, fetchedAt, provider)}
+        for slotUnits, slot in self.sharedSlots:
+            if slotUnits not in forecasts:
+                forecasts[slotUnits] = self.buildForecast(obj, slotUnits, fetchedAt, provider)
+        return forecasts
+
+    def publishForecasts(self, obj, units, forecasts):
+        # publish the forecasts built from obj into the slots - the shared slots get the same Forecast object when they
+        # show the same units, so their frames are held once
+        self.slot.publish(forecasts[units])
+        for slotUnits, slot in self.sharedSlots:
+            slot.publish(forecasts[slotUnits])
+        self.publishedObj = obj
+        self.publishedUnits = units
+
+    def buildForecast(self, obj, units, fetchedAt, provider=None):
+        # parse and assign the weather data in units
+        with STAGE_SECONDS.time(stage='parse'):
+            series = (provider or self.provider).parse(obj, units)
+
+        # call function to assign pixel values to weather data
+        with STAGE_SECONDS.time(stage='assign'):
+            frames = pixelAssign(series)
+
+        cacheInfo = buildFrame.cache_info()
+        logger.info('Published forecast.', extra={'data': {'hours': len(series), 'temp': series.temp[0],
+                                                           'wind': series.wind[0], 'fct': series.fct[0],
+                                                           'frame_cache': [cacheInfo.hits, cacheInfo.misses]}})
+        if logger.isEnabledFor(logging.DEBUG):
+            tempData, humidData, windData, fctData, fctTime = series.strings()
+            logger.debug('Forecast data.', extra={'data': {'temp': tempData, 'humid': humidData, 'wind': windData,
+                                                           'fct': fctData, 'fcttime': fctTime}})
+            pixels = {'current': frames[0].toList()}
+            for i, horizon in enumerate(HORIZONS):
+                pixels['low_' + str(horizon) + 'h'] = frames[1 + 2*i].toList()
+                pixels['high_' + str(horizon) + 'h'] = frames[2 + 2*i].toList()
+            logger.debug('Frame pixels.', extra={'data': pixels})
+
+        FORECASTS_PUBLISHED.inc()
+        return Forecast(series, frames, fetchedAt)
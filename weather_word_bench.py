@@ -0,0 +1,250 @@
+# weather_word_bench.py
+#
+# This project utilizes a 22 x 13 matrix of RGB LEDs to visualize weather forecast data pulled from an API.
+#
+# This benchmark program runs each stage of the fetch, parse, assign and display pipeline of weather_word.py against
+# recorded (or generated) forecast payloads and a simulated LED strip, so that it can be run on any computer. For each
+# stage it reports latency percentiles, memory allocated per call and, for the display stages, frames per second.
+#
+# Results can be saved as a baseline and later runs compared against it. The program exits with status 1 when a stage
+# is slower than the baseline by more than the allowed threshold.
+#
+# Usage:
+#   python3 weather_word_bench.py                                  run with generated payloads
+#   python3 weather_word_bench.py --payload response.json          run with recorded API responses (repeatable)
+#   python3 weather_word_bench.py --save-baseline bench.json       save the results as a baseline
+#   python3 weather_word_bench.py --baseline bench.json            fail if a stage regressed against the baseline
+
+import sys
+import json
+import time
+import random
+import argparse
+import tracemalloc
+
+import weather_word
+
+UNITS = 'english'                   # temperature units used to parse the payloads
+PAYLOAD_HOURS = 36                  # hours of forecast in each generated payload (matches the hourly API)
+DEFAULT_ITERATIONS = 200            # timed calls per stage for the fast stages
+DISPLAY_ITERATIONS = 100            # timed frames per stage for the display stages
+BENCH_HORIZONS = (3, 6, 12, 18)     # horizons of the multi-horizon pixelAssign stage
+EXTRACT_CHUNK_SIZE = 4096           # bytes fed to the streaming extractor at a time
+DEFAULT_THRESHOLD = 0.25            # allowed slowdown of the median latency against the baseline (0.25 = 25%)
+
+def generatePayload(rng, hours=PAYLOAD_HOURS):
+    # generate an API response in the format of the hourly forecast with all the fields the API returns
+    forecast = []
+    for i in range(hours):
+        tempF = rng.randint(-20, 110)
+        windMph = rng.randint(0, 35)
+        forecast.append({
+            "FCTTIME": {"hour": str(i % 24), "min": "00", "civil": str(i % 12 + 1) + ":00 " + ("AM" if i % 24 < 12 else "PM"),
+                        "mday": "1", "mon": "1", "year": "2017", "pretty": "generated", "epoch": str(1483228800 + 3600*i)},
+            "temp": {"english": str(tempF), "metric": str(int((tempF - 32) / 1.8))},
+            "dewpoint": {"english": str(tempF - 10), "metric": str(int((tempF - 42) / 1.8))},
+            "condition": "generated", "icon": "generated", "icon_url": "http://icons.wxug.com/i/c/k/generated.gif",
+            "fctcode": str(rng.randint(1, 24)),
+            "sky": str(rng.randint(0, 100)),
+            "wspd": {"english": str(windMph), "metric": str(int(windMph * 1.6))},
+            "wdir": {"dir": "NW", "degrees": str(rng.randint(0, 359))},
+            "wx": "generated", "uvi": "0",
+            "humidity": str(rng.randint(5, 100)),
+            "windchill": {"english": "-9999", "metric": "-9999"},
+            "heatindex": {"english": "-9999", "metric": "-9999"},
+            "feelslike": {"english": str(tempF), "metric": str(int((tempF - 32) / 1.8))},
+            "qpf": {"english": "0.0", "metric": "0"},
+            "snow": {"english": "0.0", "metric": "0"},
+            "pop": str(rng.randint(0, 100)),
+            "mslp": {"english": "30.0", "metric": "1016"},
+        })
+    return {"response": {"version": "0.1", "features": {"hourly": 1}}, "hourly_forecast": forecast}
+
+def loadPayloads(paths, count, seed):
+    # read recorded API responses from files, or generate payloads when no files are given
+    if paths:
+        payloads = []
+        for path in paths:
+            with open(path, 'rb') as payloadFile:
+                payloads.append(payloadFile.read())
+        return payloads
+    rng = random.Random(seed)
+    return [json.dumps(generatePayload(rng)).encode('utf8') for i in range(count)]
+
+def percentile(values, fraction):
+    # nearest-rank percentile of a sorted list
+    index = min(len(values) - 1, max(0, int(round(fraction * len(values) + 0.5)) - 1))
+    return values[index]
+
+def measure(name, call, iterations, strip=None):
+    # time each call of the stage, then repeat the first call under tracemalloc to measure its allocations
+    call(0)
+    latencies = []
+    showsBefore = strip.showCount if strip is not None else 0
+    for i in range(iterations):
+        startTime = time.perf_counter()
+        call(i)
+        latencies.append(time.perf_counter() - startTime)
+    shows = strip.showCount - showsBefore if strip is not None else 0
+    tracemalloc.start()
+    call(0)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    latencies.sort()
+    total = sum(latencies)
+    return {
+        'stage': name,
+        'iterations': iterations,
+        'mean': total / iterations,
+        'p50': percentile(latencies, 0.50),
+        'p90': percentile(latencies, 0.90),
+        'p99': percentile(latencies, 0.99),
+        'max': latencies[-1],
+        'peak_bytes': peak,
+        'retained_bytes': retained,
+        'fps': shows / total if shows and total else None,
+    }
+
+def runBenchmarks(payloads, iterations, displayIterations, wireTime):
+    # run every pipeline stage against the payloads and a simulated strip
+    strip = weather_word.SimulatedStrip(weather_word.LED_COUNT, wireTime=wireTime)
+    strip.begin()
+    objs = [json.loads(payload.decode('utf8')) for payload in payloads]
+    parsed = [weather_word.parseWeatherData(obj, UNITS) for obj in objs]
+    frames = [weather_word.pixelAssign(series) for series in parsed]
+
+    def decode(i):
+        json.loads(payloads[i % len(payloads)].decode('utf8'))
+
+    def extract(i):
+        # feed the payload in socket-sized chunks as the fetch does, stopping once the first OBJMAX hours are in
+        payload = payloads[i % len(payloads)]
+        extractor = weather_word.ForecastExtractor(weather_word.OBJMAX)
+        for start in range(0, len(payload), EXTRACT_CHUNK_SIZE):
+            if extractor.feed(payload[start:start + EXTRACT_CHUNK_SIZE]):
+                break
+        extractor.close()
+
+    def parse(i):
+        weather_word.parseWeatherData(objs[i % len(objs)], UNITS)
+
+    def assignCold(i):
+        weather_word.buildFrame.cache_clear()
+        weather_word.pixelAssign(parsed[i % len(parsed)])
+
+    def assignWarm(i):
+        weather_word.pixelAssign(parsed[i % len(parsed)])
+
+    def assignHorizons(i):
+        weather_word.pixelAssign(parsed[i % len(parsed)], BENCH_HORIZONS)
+
+    # the display stages render single frames as fast as possible - the animator would otherwise pace them
+    rainbowFrames = weather_word.rainbowFrames(strip, weather_word.RAINBOW_TRACK, weather_word.RAINBOW_CYCLE_TIME)
+    next(rainbowFrames)
+    shuffleFrames = weather_word.shuffleFrames(strip, weather_word.WARNING, weather_word.OFF, 0.95, weather_word.SHUFFLE_TIME)
+    next(shuffleFrames)
+
+    diffStrip = weather_word.DiffStrip(strip)
+
+    def wipe(i):
+        weather_word.pixelWipe(strip, frames[i % len(frames)][i % 3], duration=0)
+
+    def wipeDiff(i):
+        # cycles through the current, low and high frames of each forecast as the display does
+        weather_word.pixelWipe(diffStrip, frames[(i // 3) % len(frames)][i % 3], duration=0)
+
+    def wipeRand(i):
+        shuffleFrames.send(i / float(weather_word.ANIMATION_FPS))
+        strip.show()
+
+    def rainbow(i):
+        rainbowFrames.send(i / float(weather_word.ANIMATION_FPS))
+        strip.show()
+
+    if weather_word.framebuffer.available():
+        buffer = weather_word.FrameBuffer(strip.numPixels())
+        bufferRainbowFrames = weather_word.framebuffer.rainbowFrames(strip, buffer, weather_word.RAINBOW_CYCLE_TIME)
+        next(bufferRainbowFrames)
+
+    def bufferRainbow(i):
+        bufferRainbowFrames.send(i / float(weather_word.ANIMATION_FPS))
+        strip.show()
+
+    results = [
+        measure('decode', decode, iterations),
+        measure('extract (stream)', extract, iterations),
+        measure('parseWeatherData', parse, iterations),
+        measure('pixelAssign (cold cache)', assignCold, iterations),
+        measure('pixelAssign', assignWarm, iterations),
+        measure('pixelAssign (' + str(len(BENCH_HORIZONS)) + ' horizons)', assignHorizons, iterations),
+        measure('pixelWipe', wipe, displayIterations, strip),
+        measure('pixelWipe (diff)', wipeDiff, displayIterations, strip),
+        measure('colorWipeRand frame', wipeRand, displayIterations, strip),
+        measure('rainbow frame', rainbow, displayIterations, strip),
+    ]
+    if weather_word.framebuffer.available():
+        results.append(measure('rainbow frame (numpy)', bufferRainbow, displayIterations, strip))
+    return results
+
+def formatTime(seconds):
+    if seconds >= 1:
+        return '%.2f s' % seconds
+    if seconds >= 0.001:
+        return '%.2f ms' % (seconds * 1000)
+    return '%.1f us' % (seconds * 1000000)
+
+def printResults(results):
+    print('%-26s %10s %10s %10s %10s %12s %10s' % ('stage', 'p50', 'p90', 'p99', 'max', 'peak alloc', 'fps'))
+    for r in results:
+        print('%-26s %10s %10s %10s %10s %12s %10s' % (r['stage'], formatTime(r['p50']), formatTime(r['p90']),
+              formatTime(r['p99']), formatTime(r['max']), str(r['peak_bytes']) + ' B',
+              '%.1f' % r['fps'] if r['fps'] else '-'))
+
+def compareBaseline(results, baseline, threshold):
+    # return the stages whose median latency is slower than the baseline by more than the threshold
+    previous = {r['stage']: r for r in baseline['results']}
+    regressions = []
+    for r in results:
+        if r['stage'] not in previous:
+            continue
+        ratio = r['p50'] / previous[r['stage']]['p50'] if previous[r['stage']]['p50'] else 1.0
+        if ratio > 1.0 + threshold:
+            regressions.append((r['stage'], previous[r['stage']]['p50'], r['p50'], ratio))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the weather_word display pipeline.')
+    parser.add_argument('--payload', action='append', default=[], help='recorded API response file (repeatable)')
+    parser.add_argument('--payloads', type=int, default=8, help='number of payloads to generate when none are given')
+    parser.add_argument('--seed', type=int, default=0, help='seed for generated payloads')
+    parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS, help='timed calls per fast stage')
+    parser.add_argument('--display-iterations', type=int, default=DISPLAY_ITERATIONS, help='timed frames per display stage')
+    parser.add_argument('--wire-time', action='store_true', help='model the WS2812 transfer time on each show()')
+    parser.add_argument('--save-baseline', metavar='FILE', help='save the results as a baseline')
+    parser.add_argument('--baseline', metavar='FILE', help='compare the results against a saved baseline')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='allowed slowdown against the baseline')
+    args = parser.parse_args(argv)
+
+    payloads = loadPayloads(args.payload, args.payloads, args.seed)
+    results = runBenchmarks(payloads, args.iterations, args.display_iterations, args.wire_time)
+    printResults(results)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as baselineFile:
+            json.dump({'python': sys.version, 'results': results}, baselineFile, indent=2)
+        print('\nSaved baseline to ' + args.save_baseline)
+
+    if args.baseline:
+        with open(args.baseline, 'r') as baselineFile:
+            baseline = json.load(baselineFile)
+        regressions = compareBaseline(results, baseline, args.threshold)
+        if regressions:
+            print('\nRegressions beyond ' + str(int(args.threshold * 100)) + '% of the baseline median:')
+            for stage, before, after, ratio in regressions:
+                print('  %-26s %10s -> %10s (%.2fx)' % (stage, formatTime(before), formatTime(after), ratio))
+            return 1
+        print('\nNo regressions beyond ' + str(int(args.threshold * 100)) + '% of the baseline median.')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,389 @@
+# weather_word_standin.py
+#
+# This project utilizes a 22 x 13 matrix of RGB LEDs to visualize weather forecast data pulled from an API.
+#
+# This program runs the fetch worker of weather_word.py against stand-in api servers on the local machine, so that the
+# failure paths of fetching, caching and hedging can be checked on any computer without an api key. Each scenario sets
+# up stand-ins that answer as it needs, drives FetchWorker.warmStart() and fetchCycle() (or the workers of a FetchPool)
+# directly with a temporary directory as PATH_NAME, and checks what was published, cached, requested and measured.
+#
+# Usage:
+#   python3 weather_word_standin.py                                run every scenario
+#   python3 weather_word_standin.py --scenario unparsable-cache    run one scenario (repeatable)
+# The program exits with status 1 when a scenario fails.
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import weather_word.fetch
+import weather_word.cache
+from weather_word.providers import createProvider
+from weather_word.worker import ForecastSlot, FetchWorker
+from weather_word.displays import FetchPool
+from weather_word.metrics import RETRY_FAILURES, LAST_SUCCESS
+from weather_word_bench import generatePayload, PAYLOAD_HOURS
+
+APIBOOT = '123456789abcdefe\nFL/Miami\nenglish\n'    # apiboot.txt written for each scenario
+
+class ScenarioFailed(Exception):
+    pass
+
+def check(condition, message):
+    if not condition:
+        raise ScenarioFailed(message)
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # clients hang up on purpose (hedged requests are cancelled) - nothing to report
+        pass
+
+class StandIn(object):
+    # local api answering each request with respond(path, headers), which returns (status, headers, body, delay)
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.requests = []              # (path, If-None-Match header) of each request
+        standIn = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                standIn.requests.append((self.path, self.headers.get('If-None-Match')))
+                status, headers, body, delay = standIn.respond(self.path, self.headers)
+                if delay:
+                    time.sleep(delay)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = StandInServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+        self.url = 'http://127.0.0.1:' + str(self.server.server_port)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+class ScenarioRun(object):
+    # the temporary PATH_NAME, environment and stand-ins of one scenario
+
+    def __init__(self):
+        self.path = tempfile.mkdtemp(prefix='weather_word_') + os.sep
+        self.environ = dict(os.environ)
+        self.pathNames = dict((module, module.PATH_NAME) for module in (weather_word.fetch, weather_word.cache))
+        self.standIns = []
+        for module in self.pathNames:
+            module.PATH_NAME = self.path
+        with open(self.path + 'apiboot.txt', 'w') as bootFile:
+            bootFile.write(APIBOOT)
+        os.environ.pop('WEATHER_WORD_HEDGE', None)
+
+    def standIn(self, respond):
+        standIn = StandIn(respond)
+        self.standIns.append(standIn)
+        return standIn
+
+    def wunderground(self, respond):
+        # stand-in for the Weather Underground api, used by the workers of the scenario
+        standIn = self.standIn(respond)
+        os.environ['WEATHER_WORD_API_URL'] = standIn.url + '/api/'
+        return standIn
+
+    def openMeteo(self, respond):
+        # stand-in for the Open-Meteo api
+        standIn = self.standIn(respond)
+        os.environ['WEATHER_WORD_OPEN_METEO_URL'] = standIn.url + '/v1/forecast'
+        return standIn
+
+    def worker(self, provider='wunderground', query=None):
+        # a worker fetching from the stand-in of provider (for query instead of the one in apiboot.txt) and the slot it
+        # publishes into
+        slot = ForecastSlot()
+        return slot, FetchWorker(slot, provider=createProvider(provider), query=query)
+
+    def close(self):
+        for standIn in self.standIns:
+            standIn.close()
+        for module, pathName in self.pathNames.items():
+            module.PATH_NAME = pathName
+        os.environ.clear()
+        os.environ.update(self.environ)
+        shutil.rmtree(self.path, ignore_errors=True)
+
+def payloadBody(payload):
+    return json.dumps(payload).encode('utf8')
+
+def openMeteoPayload(rng, hours=PAYLOAD_HOURS):
+    # generate a response of the Open-Meteo forecast api with the hourly variables the provider requests
+    start = time.localtime()
+    return {'latitude': 25.77, 'longitude': -80.19, 'hourly': {
+        'time': ['%04d-%02d-%02dT%02d:00' % (start.tm_year, start.tm_mon, start.tm_mday, (start.tm_hour + i) % 24)
+                 for i in range(hours)],
+        'temperature_2m': [round(rng.uniform(-20, 110), 1) for i in range(hours)],
+        'relative_humidity_2m': [rng.randint(10, 100) for i in range(hours)],
+        'wind_speed_10m': [round(rng.uniform(0, 35), 1) for i in range(hours)],
+        'weather_code': [rng.choice((0, 1, 2, 3, 45, 61, 71, 95)) for i in range(hours)]}}
+
+def scenarioUnparsableCache(run):
+    # a fresh cached response that passes the checks but cannot be parsed is discarded at startup and fetched again
+    payload = generatePayload(random.Random(1))
+    standIn = run.wunderground(lambda path, headers: (200, {}, payloadBody(payload), 0))
+    slot, worker = run.worker()
+    url = worker.provider.url(worker.readApiValues())
+    broken = generatePayload(random.Random(2))
+    broken['hourly_forecast'][0]['wspd']['english'] = 'calm'
+    weather_word.cache.saveCachedForecast(url, broken)
+    check(not worker.warmStart(), 'the unparsable cached forecast was published')
+    check(weather_word.cache.loadCacheEntry(url) is None, 'the unparsable cached forecast was kept')
+    check(worker.fetchCycle(), 'the worker stopped')
+    forecast = slot.latest()[0]
+    check(forecast is not None and len(standIn.requests) == 1, 'the forecast was not fetched again')
+    check(forecast.series.temp[0] == int(payload['hourly_forecast'][0]['temp']['english']),
+          'the published forecast is not the fetched one')
+    check(weather_word.cache.loadCacheEntry(url) is not None, 'the fetched forecast was not cached')
+
+def scenarioErrorWithETag(run):
+    # a 200 error response with an ETag is a failed attempt whose validators are not kept, so the next request is not
+    # answered with a 304 for it - and a 304 with no response held is a failed attempt too
+    answer = [200, '"e1"', {'response': {'error': {'type': 'keynotfound'}}}]
+
+    def respond(path, headers):
+        status, etag, payload = answer
+        if headers.get('If-None-Match') == etag:
+            return 304, {'ETag': etag}, b'', 0
+        return status, {'ETag': etag}, payloadBody(payload), 0
+    standIn = run.wunderground(respond)
+    slot, worker = run.worker()
+    url = worker.provider.url(worker.readApiValues())
+    for cycle in range(2):
+        check(worker.fetchCycle(), 'the worker stopped')
+        check(slot.latest()[0] is None and slot.failures == cycle + 1, 'the error response was not a failed attempt')
+    check(standIn.requests[1][1] is None, 'the validators of the error response were sent')
+
+    payload = generatePayload(random.Random(3))
+    answer[:] = [200, '"e2"', payload]
+    worker.fetchCycle()
+    forecast, version = slot.latest()
+    check(forecast is not None and slot.failures == 0, 'the good response was not published')
+    # expire the cached response so that the next cycle revalidates it
+    weather_word.cache.discardCachedForecast()
+    worker.fetchCycle()
+    check(standIn.requests[-1][1] == '"e2"' and slot.latest() == (forecast, version),
+          'the good response was not revalidated')
+
+    # validators of a response that is no longer held
+    slot, worker = run.worker()
+    weather_word.cache.discardCachedForecast()
+    worker.restoreResponse(url)
+    worker.client.setValidators(url, '"e2"', None)
+    check(worker.fetchCycle(), 'the worker stopped')
+    check(slot.latest()[0] is None and slot.failures == 1, 'the 304 without a held response was not a failed attempt')
+    check(worker.client.getValidators(url) == (None, None), 'the validators without a response were kept')
+    worker.fetchCycle()
+    check(standIn.requests[-1][1] is None and slot.latest()[0] is not None, 'the whole response was not fetched again')
+
+def scenarioUnparsableResponse(run):
+    # a fetched response that passes the checks but cannot be parsed (a word for the wind speed, or fewer hours than
+    # OBJMAX) is a failed attempt: the last good forecast stays published and cached, and its validators are not kept
+    good = generatePayload(random.Random(4))
+    windy = generatePayload(random.Random(5))
+    windy['hourly_forecast'][0]['wspd']['english'] = ''
+    answers = [('"g1"', good), ('"b1"', windy), ('"b2"', generatePayload(random.Random(6), hours=3)), ('"g2"', good)]
+
+    def respond(path, headers):
+        etag, payload = answers[0]
+        if headers.get('If-None-Match') == etag:
+            return 304, {'ETag': etag}, b'', 0
+        return 200, {'ETag': etag}, payloadBody(payload), 0
+    standIn = run.wunderground(respond)
+    slot, worker = run.worker()
+    url = worker.provider.url(worker.readApiValues())
+    check(worker.fetchCycle(), 'the worker stopped')
+    forecast, version = slot.latest()
+    held = worker.lastObj
+    check(forecast is not None, 'the good response was not published')
+    for failures in (1, 2):
+        answers.pop(0)
+        # expire the cached response so that the next cycle fetches
+        weather_word.cache.saveCachedForecast(url, held, time.time() - 3600, '"g1"')
+        check(worker.fetchCycle(), 'the worker stopped on the unparsable response')
+        check(slot.latest() == (forecast, version) and slot.failures == failures,
+              'the unparsable response was not a failed attempt')
+        check(worker.lastObj is held and weather_word.cache.loadCacheEntry(url)['payload'] == held,
+              'the unparsable response replaced the last good one')
+        check(worker.client.getValidators(url) == (None, None), 'the validators of the unparsable response were kept')
+    answers.pop(0)
+    check(worker.fetchCycle(), 'the worker stopped')
+    check(standIn.requests[-1][1] is None, 'the validators of the unparsable response were sent')
+    check(slot.latest()[1] == version + 1 and slot.failures == 0, 'the good response was not published again')
+
+def scenarioOpenMeteoNull(run):
+    # an Open-Meteo response with a missing (null) value is a failed attempt rather than a reading of zero
+    payload = openMeteoPayload(random.Random(4))
+    payload['hourly']['temperature_2m'][0] = None
+    run.openMeteo(lambda path, headers: (200, {}, payloadBody(payload), 0))
+    slot, worker = run.worker('open-meteo', ('25.77,-80.19', 'english'))
+    check(worker.fetchCycle(), 'the worker stopped')
+    check(slot.latest()[0] is None and slot.failures == 1, 'the response with a missing value was published')
+
+    payload['hourly']['temperature_2m'][0] = 71.6
+    worker.fetchCycle()
+    forecast = slot.latest()[0]
+    check(forecast is not None and forecast.series.temp[0] == 72, 'the complete response was not published')
+
+def scenarioHedgeOtherProvider(run):
+    # when a slow provider is hedged against another provider, the answer of the other provider is parsed by it and is
+    # not cached as a response of the slow one
+    payload = generatePayload(random.Random(5))
+    delay = [1.0]
+    run.wunderground(lambda path, headers: (200, {'ETag': '"w1"'}, payloadBody(payload), delay[0]))
+    other = openMeteoPayload(random.Random(6))
+    run.openMeteo(lambda path, headers: (200, {}, payloadBody(other), 0))
+    os.environ['WEATHER_WORD_HEDGE'] = 'open-meteo@25.77,-80.19'
+    slot, worker = run.worker()
+    worker.hedger.initialDelay = 0.1
+    url = worker.provider.url(worker.readApiValues())
+    try:
+        check(worker.fetchCycle(), 'the worker stopped')
+        forecast = slot.latest()[0]
+        check(forecast is not None and forecast.series.temp[0] == int(round(other['hourly']['temperature_2m'][0])),
+              'the answer of the other provider was not published')
+        check(weather_word.cache.loadCacheEntry(url) is None, 'the answer of the other provider was cached')
+        check(worker.lastObj is None, 'the answer of the other provider was kept as the response of the provider')
+    finally:
+        worker.hedger.close()
+
+    # a restart finds no cached forecast, and the provider's own answer is cached once it is fast again
+    delay[0] = 0
+    slot, worker = run.worker()
+    try:
+        check(not worker.warmStart(), 'a cached forecast was published')
+        check(worker.fetchCycle(), 'the worker stopped')
+        forecast = slot.latest()[0]
+        check(forecast is not None and forecast.series.temp[0] == int(payload['hourly_forecast'][0]['temp']['english']),
+              'the answer of the provider was not published')
+        entry = weather_word.cache.loadCacheEntry(url)
+        check(entry is not None and entry['etag'] == '"w1"', 'the answer of the provider was not cached')
+    finally:
+        worker.hedger.close()
+
+def scenarioHedgeSlowPrimary(run):
+    # the answer of a secondary that is in at once (the mock provider) is taken while the slow provider is still busy,
+    # even when the provider fails afterwards
+    delay = 1.0
+    run.wunderground(lambda path, headers: (200, {}, b'{}', delay))
+    os.environ['WEATHER_WORD_HEDGE'] = 'mock'
+    slot, worker = run.worker()
+    worker.hedger.initialDelay = 0.1
+    try:
+        start = time.time()
+        check(worker.fetchCycle(), 'the worker stopped')
+        elapsed = time.time() - start
+        check(slot.latest()[0] is not None and worker.hedger.lastEndpoint.name == 'mock',
+              'the answer of the secondary was not published')
+        check(elapsed < delay, 'the answer of the secondary was taken after ' + str(round(elapsed, 2)) + ' s')
+    finally:
+        worker.hedger.close()
+
+    # the answer of a provider that is in at once is taken without waiting for the hedge delay
+    secondary = run.openMeteo(lambda path, headers: (200, {}, payloadBody(openMeteoPayload(random.Random(7))), 0))
+    os.environ['WEATHER_WORD_HEDGE'] = 'open-meteo@25.77,-80.19'
+    slot, worker = run.worker('mock')
+    worker.hedger.initialDelay = 0.5
+    try:
+        start = time.time()
+        check(worker.fetchCycle(), 'the worker stopped')
+        elapsed = time.time() - start
+        check(slot.latest()[0] is not None and worker.hedger.lastEndpoint is worker.hedger.primary,
+              'the answer of the provider was not published')
+        check(not secondary.requests and elapsed < worker.hedger.initialDelay,
+              'the answer of the provider was taken after ' + str(round(elapsed, 2)) + ' s')
+    finally:
+        worker.hedger.close()
+
+def scenarioPoolLocations(run):
+    # the workers of a fetch thread share its connection to the api, and the retry metrics of a failing location are
+    # not overwritten by the other locations
+    payload = generatePayload(random.Random(5))
+
+    def respond(path, headers):
+        if 'NY/New_York' in path:
+            return (200, {}, b'{}', 0)
+        return (200, {}, payloadBody(payload), 0)
+
+    standIn = run.wunderground(respond)
+    pool = FetchPool(createProvider('wunderground'), threads=1)
+    queries = ('FL/Miami', 'CA/San_Francisco', 'NY/New_York')
+    slots = [pool.subscribe(query, 'english') for query in queries]
+    thread = pool.threads[0]
+    check(len(thread.workers) == 3, 'the locations did not get a worker each on the fetch thread')
+    for worker in thread.workers:
+        check(worker.runCycle(), 'a worker stopped')
+    check(len(standIn.requests) == 3, 'expected one request per location, got ' + str(len(standIn.requests)))
+    check(thread.client.stats()['connections'] == 1, 'the workers of the fetch thread did not share its connection')
+    check(slots[0].latest()[0] is not None and slots[1].latest()[0] is not None, 'a forecast was not published')
+    check(slots[2].latest()[0] is None and slots[2].failures == 1, 'the failing location was not reported')
+    check(RETRY_FAILURES.value(worker='NY/New_York english') == 1, 'the failures of the failing location were lost')
+    check(RETRY_FAILURES.value(worker='FL/Miami english') == 0 and LAST_SUCCESS.value(worker='NY/New_York english') == 0,
+          'the retry metrics of the locations were mixed up')
+
+SCENARIOS = [
+    ('unparsable-cache', scenarioUnparsableCache),
+    ('error-with-etag', scenarioErrorWithETag),
+    ('unparsable-response', scenarioUnparsableResponse),
+    ('open-meteo-null', scenarioOpenMeteoNull),
+    ('hedge-other-provider', scenarioHedgeOtherProvider),
+    ('hedge-slow-primary', scenarioHedgeSlowPrimary),
+    ('pool-locations', scenarioPoolLocations),
+]
+
+def runScenario(scenario):
+    # run a scenario - returns None when it passed, otherwise what went wrong
+    run = ScenarioRun()
+    try:
+        scenario(run)
+    except ScenarioFailed as e:
+        return str(e)
+    except Exception as e:
+        return 'raised ' + repr(e)
+    finally:
+        run.close()
+    return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check the weather_word fetch worker against stand-in api servers.')
+    parser.add_argument('--scenario', action='append', default=[], choices=[name for name, scenario in SCENARIOS],
+                        help='run only this scenario (repeatable)')
+    args = parser.parse_args(argv)
+
+    failed = 0
+    for name, scenario in SCENARIOS:
+        if args.scenario and name not in args.scenario:
+            continue
+        start = time.time()
+        error = runScenario(scenario)
+        print('%-24s %-4s %6.2f s%s' % (name, 'ok' if error is None else 'FAIL', time.time() - start,
+                                       '' if error is None else '   ' + error))
+        if error is not None:
+            failed += 1
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
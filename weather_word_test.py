@@ -15,7 +15,7 @@
 # by Weather Underground, LLC (WUL). An API key can be obtained at www.wunderground.com/weather/api.
 
 import time
-from neopixel import *
+from weather_word import Color, createStrip
 
 # LED strip configuration:
 LED_COUNT      = 286                # Total number of LED pixels.
@@ -61,8 +61,8 @@ def pixelWipe(strip, pixelData, wait_ms=10):
     strip.show()
 
 def main():
-    # Create NeoPixel object with appropriate configuration.
-    strip = Adafruit_NeoPixel(LED_COUNT, LED_PIN, LED_FREQ_HZ, LED_DMA, LED_INVERT, LED_BRIGHTNESS)
+    # Create NeoPixel object (or simulated strip, see WEATHER_WORD_STRIP) with appropriate configuration.
+    strip = createStrip(brightness=LED_BRIGHTNESS)
     # Intialize the library (must be called once before other functions).
     strip.begin()
 